@@ -1,37 +1,108 @@
 # apps/backend/app/agents/base.py
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional, Any, Set
-import openai
+from typing import List, Dict, Optional, Any, Set, Tuple, ClassVar, Mapping
 import os
+import asyncio
 import logging
 import time
 import json
+import hashlib
+from collections import deque, OrderedDict, namedtuple
+from itertools import islice
+import re
+import heapq
+import math
 from dataclasses import dataclass, field
 from enum import Enum
 from app.env.grid import Grid
 from app.tools.message import Message, MessageType, MessagePriority
 from app.tools.message_queue import CoordinationManager, SharedState
+from app.agents.batch_dispatcher import BatchLLMDispatcher
+from app.agents.openai_client import OPENAI_API_KEY, get_client
+from app.agents.prompts import SYSTEM_PROMPTS, SITUATION_TEMPLATE
 
 logger = logging.getLogger(__name__)
 
+# LLM settings are resolved once at import (main.py loads .env before importing agents)
+_DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "gpt-3.5-turbo")
+_MAX_TOKENS = int(os.getenv("MAX_TOKENS", "150"))
+_TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
+_LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Agents act on the first line of a decision, so stream it and stop reading there
+_LLM_STREAM = os.getenv("LLM_STREAM", "true").lower() == "true"
+# Upper bound on user prompt size, estimated at ~4 characters per token
+_PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "800"))
+_CHARS_PER_TOKEN = 4
+# Reusing decisions for repeated prompts gives up sampling variety, so it is opt-in
+_LLM_CACHE = os.getenv("LLM_CACHE", "false").lower() == "true"
+_LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+_LLM_CACHE_SIZE = 1024
+# Minimum word-bigram Jaccard similarity of the non-spatial context for a decision to be reused.
+# Changing one word of n bigrams scores (n - 2) / (n + 2), so 0.9 tolerates a single changed word
+# (e.g. a progress percentage) once the context has 38+ bigrams, while adding, dropping or
+# swapping a whole message or memory in a five-message, three-memory context scores 0.7-0.85.
+_LLM_SEMANTIC_THRESHOLD = float(os.getenv("LLM_SEMANTIC_THRESHOLD", "0.9"))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Okapi BM25 parameters and the weights used to fuse lexical relevance
+# with the importance/usage score during retrieval
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+_LEXICAL_WEIGHT = 0.4
+_UTILITY_WEIGHT = 0.6
+
+def _tokenize(text: str) -> Set[str]:
+    """Split text into lowercase word tokens for memory indexing"""
+    return set(_TOKEN_RE.findall(text.lower()))
+
+# One orthogonally adjacent cell as seen in an observation
+NeighborCell = namedtuple("NeighborCell", "position occupied_by structure")
+# (position, surroundings) that a reused decision must match exactly
+SituationAnchor = Tuple[Optional[Tuple[int, int]], Tuple[NeighborCell, ...]]
+
 class MemoryType(Enum):
     SHORT_TERM = "short_term"  # Last few actions/observations
     LONG_TERM = "long_term"    # Important experiences and learnings
     EPISODIC = "episodic"      # Specific event sequences
     SEMANTIC = "semantic"      # General knowledge and rules
 
-@dataclass
+class MemoryKind(Enum):
+    NOTE = "note"                # Free-form entry
+    OBSERVATION = "observation"  # What the agent saw around it
+    DECISION = "decision"        # An LLM decision
+    MESSAGE = "message"          # A message the agent sent
+    STATUS = "status"            # A status change
+    OUTCOME = "outcome"          # Result of an action
+    TOOL = "tool"                # A tool invocation
+    ERROR = "error"              # A failure
+
+# Memory kinds left out of the LLM prompt's relevant-memories section
+_PROMPT_EXCLUDED_KINDS = frozenset({MemoryKind.OBSERVATION})
+
+@dataclass(slots=True)
 class MemoryEntry:
     content: str
     memory_type: MemoryType
     timestamp: float = field(default_factory=time.time)
     importance: float = 1.0  # 0.0 to 1.0
+    kind: MemoryKind = MemoryKind.NOTE
     associated_data: Dict[str, Any] = field(default_factory=dict)
     retrieval_count: int = 0
-    last_accessed: float = field(default_factory=time.time)
-
-@dataclass
+    last_accessed: float = 0.0  # defaults to timestamp
+    _content_lower: str = field(init=False, repr=False, compare=False)
+    _tokens: frozenset = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Reuse the creation timestamp instead of a second clock read
+        if not self.last_accessed:
+            self.last_accessed = self.timestamp
+        # Lowercase and tokenize once at store time; retrieval only does set lookups
+        self._content_lower = self.content.lower()
+        self._tokens = frozenset(_TOKEN_RE.findall(self._content_lower))
+
+@dataclass(slots=True)
 class ToolResult:
     success: bool
     result: Any
@@ -39,6 +110,28 @@ class ToolResult:
     execution_time: float = 0.0
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+@dataclass(slots=True)
+class PerfMetrics:
+    actions_taken: int = 0
+    successful_actions: int = 0
+    messages_sent: int = 0
+    messages_received: int = 0
+    planning_cycles: int = 0
+    average_response_time: float = 0.0
+    tool_usage: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Snapshot the metrics as a JSON-friendly dict"""
+        return {
+            "actions_taken": self.actions_taken,
+            "successful_actions": self.successful_actions,
+            "messages_sent": self.messages_sent,
+            "messages_received": self.messages_received,
+            "planning_cycles": self.planning_cycles,
+            "tool_usage": dict(self.tool_usage),
+            "average_response_time": self.average_response_time
+        }
+
 class BaseTool(ABC):
     """Base class for agent tools"""
     
@@ -65,140 +158,271 @@ class MemorySystem:
     
     def __init__(self, max_entries: int = 1000):
         self.max_entries = max_entries
-        self.memories: Dict[MemoryType, List[MemoryEntry]] = {
+        self._capacity = max_entries // len(MemoryType)
+        self._next_id = 0
+        # Entries per type keyed by a monotonically increasing id (insertion ordered)
+        self.memories: Dict[MemoryType, Dict[int, MemoryEntry]] = {
+            memory_type: {} for memory_type in MemoryType
+        }
+        # Min-heap of (importance, entry id) per type, so eviction is O(log n)
+        self._eviction_heaps: Dict[MemoryType, List[Tuple[float, int]]] = {
             memory_type: [] for memory_type in MemoryType
         }
-        self.importance_threshold = 0.5
+        # Inverted index: token -> ids of entries containing it
+        self._postings: Dict[MemoryType, Dict[str, Set[int]]] = {
+            memory_type: {} for memory_type in MemoryType
+        }
+        # Total token count per type for BM25 length normalization
+        self._token_totals: Dict[MemoryType, int] = {
+            memory_type: 0 for memory_type in MemoryType
+        }
         
-    def store(self, content: str, memory_type: MemoryType, importance: float = 1.0, **metadata):
+    def store(self, content: str, memory_type: MemoryType, importance: float = 1.0,
+              kind: MemoryKind = MemoryKind.NOTE, **metadata):
         """Store a memory entry"""
         entry = MemoryEntry(
             content=content,
             memory_type=memory_type,
             importance=importance,
+            kind=kind,
             associated_data=metadata
         )
         
-        self.memories[memory_type].append(entry)
+        entry_id = self._next_id
+        self._next_id += 1
+        self.memories[memory_type][entry_id] = entry
+        heapq.heappush(self._eviction_heaps[memory_type], (importance, entry_id))
+        self._index_entry(memory_type, entry_id, entry)
         
         # Prune old memories if we exceed capacity
-        if len(self.memories[memory_type]) > self.max_entries // len(MemoryType):
+        if len(self.memories[memory_type]) > self._capacity:
             self._prune_memories(memory_type)
     
     def retrieve(self, query: str, memory_type: Optional[MemoryType] = None, 
-                 limit: int = 5) -> List[MemoryEntry]:
+                 limit: int = 5, exclude_kinds: Optional[Set[MemoryKind]] = None) -> List[MemoryEntry]:
         """Retrieve relevant memories"""
-        relevant_memories = []
+        candidates: List[Tuple[float, float, MemoryEntry]] = []
+        max_lexical = max_utility = 0.0
+        query_tokens = _tokenize(query)
+        now = time.time()
         
         search_types = [memory_type] if memory_type else list(MemoryType)
         
         for mem_type in search_types:
-            for memory in self.memories[mem_type]:
-                # Simple keyword matching - could be enhanced with embeddings
-                if any(word.lower() in memory.content.lower() for word in query.split()):
-                    memory.retrieval_count += 1
-                    memory.last_accessed = time.time()
-                    relevant_memories.append(memory)
-        
-        # Sort by relevance (importance + recency + retrieval frequency)
-        relevant_memories.sort(
-            key=lambda m: m.importance * (1 + m.retrieval_count) * (1 / (time.time() - m.last_accessed + 1)),
-            reverse=True
+            postings = self._postings[mem_type]
+            matches = [postings[token] for token in query_tokens if token in postings]
+            if not matches:
+                continue
+            memories = self.memories[mem_type]
+            doc_count = len(memories)
+            length_scale = _BM25_B / (self._token_totals[mem_type] / doc_count)
+            
+            # BM25 with binary term frequency: sum the idf of matched terms per entry
+            idf_sums: Dict[int, float] = {}
+            for posting in matches:
+                idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for entry_id in posting:
+                    idf_sums[entry_id] = idf_sums.get(entry_id, 0.0) + idf
+            
+            # Single pass: record the access, score both signals and track their maxima
+            for entry_id, idf_sum in idf_sums.items():
+                memory = memories[entry_id]
+                if exclude_kinds and memory.kind in exclude_kinds:
+                    continue
+                memory.retrieval_count += 1
+                memory.last_accessed = now
+                length_norm = 1 - _BM25_B + length_scale * len(memory._tokens)
+                lexical = idf_sum * (_BM25_K1 + 1) / (1 + _BM25_K1 * length_norm)
+                utility = memory.importance * (1 + memory.retrieval_count)
+                if lexical > max_lexical:
+                    max_lexical = lexical
+                if utility > max_utility:
+                    max_utility = utility
+                candidates.append((lexical, utility, memory))
+        
+        if not candidates:
+            return []
+        
+        # Fuse lexical relevance with importance + retrieval frequency. Every match
+        # was just accessed, so the recency factor 1 / (now - last_accessed + 1) is 1.
+        lexical_scale = _LEXICAL_WEIGHT / (max_lexical or 1.0)
+        utility_scale = _UTILITY_WEIGHT / (max_utility or 1.0)
+        top = heapq.nlargest(
+            limit,
+            candidates,
+            key=lambda c: c[0] * lexical_scale + c[1] * utility_scale
         )
-        
-        return relevant_memories[:limit]
+        return [memory for _, _, memory in top]
     
     def get_recent(self, memory_type: MemoryType, limit: int = 10) -> List[MemoryEntry]:
         """Get recent memories of a specific type"""
-        return sorted(
-            self.memories[memory_type],
-            key=lambda m: m.timestamp,
-            reverse=True
-        )[:limit]
+        # Entries are kept in insertion order, newest last
+        return list(islice(reversed(self.memories[memory_type].values()), limit))
+    
+    def _index_entry(self, memory_type: MemoryType, entry_id: int, entry: MemoryEntry):
+        """Add an entry's tokens to the inverted index"""
+        postings = self._postings[memory_type]
+        for token in entry._tokens:
+            postings.setdefault(token, set()).add(entry_id)
+        self._token_totals[memory_type] += len(entry._tokens)
+    
+    def _unindex_entry(self, memory_type: MemoryType, entry_id: int, entry: MemoryEntry):
+        """Remove an entry's tokens from the inverted index"""
+        postings = self._postings[memory_type]
+        for token in entry._tokens:
+            posting = postings[token]
+            posting.discard(entry_id)
+            if not posting:
+                del postings[token]
+        self._token_totals[memory_type] -= len(entry._tokens)
     
     def _prune_memories(self, memory_type: MemoryType):
         """Remove least important memories"""
         memories = self.memories[memory_type]
-        
-        # Keep memories above importance threshold and recent memories
-        current_time = time.time()
-        keep_memories = [
-            m for m in memories
-            if m.importance >= self.importance_threshold or 
-            (current_time - m.timestamp) < 3600  # Keep last hour
-        ]
-        
-        # If still too many, keep the most important ones
-        if len(keep_memories) > self.max_entries // len(MemoryType):
-            keep_memories.sort(key=lambda m: m.importance, reverse=True)
-            keep_memories = keep_memories[:self.max_entries // len(MemoryType)]
-        
-        self.memories[memory_type] = keep_memories
+        eviction_heap = self._eviction_heaps[memory_type]
+        
+        # Lowest importance goes first; among equals, the oldest entry
+        while len(memories) > self._capacity:
+            _, entry_id = heapq.heappop(eviction_heap)
+            self._unindex_entry(memory_type, entry_id, memories.pop(entry_id))
+
+# Step templates for PlanningSystem.create_plan, checked in order against the goal.
+# Steps are shared between plans and must be treated as read-only.
+_PLAN_TEMPLATES: Dict[str, Tuple[Dict, ...]] = {
+    "explore": (
+        {"action": "assess_current_position", "priority": 1},
+        {"action": "identify_unexplored_areas", "priority": 2},
+        {"action": "plan_exploration_route", "priority": 3},
+        {"action": "execute_movement", "priority": 4},
+        {"action": "report_findings", "priority": 5}
+    ),
+    "build": (
+        {"action": "analyze_build_location", "priority": 1},
+        {"action": "check_resources", "priority": 2},
+        {"action": "plan_construction", "priority": 3},
+        {"action": "execute_building", "priority": 4},
+        {"action": "verify_completion", "priority": 5}
+    ),
+    "coordinate": (
+        {"action": "gather_agent_status", "priority": 1},
+        {"action": "analyze_conflicts", "priority": 2},
+        {"action": "generate_solution", "priority": 3},
+        {"action": "communicate_plan", "priority": 4},
+        {"action": "monitor_execution", "priority": 5}
+    ),
+}
 
 class PlanningSystem:
     """Multi-step planning and reasoning system"""
     
     def __init__(self, agent_id: str):
         self.agent_id = agent_id
-        self.current_plan: List[Dict] = []
-        self.plan_history: List[Dict] = []
-        self.execution_log: List[Dict] = []
+        self.current_plan: deque = deque()
+        self.plan_history: deque = deque()
+        self.execution_log: deque = deque(maxlen=1024)
+        # id(step) -> its most recent execution log entry, for O(1) status updates
+        self._log_by_step: Dict[int, Dict] = {}
         
     def create_plan(self, goal: str, context: Dict) -> List[Dict]:
         """Create a multi-step plan to achieve a goal"""
         plan_steps = []
         
         # This is a simplified planning system - could be enhanced with more sophisticated algorithms
-        if "explore" in goal.lower():
-            plan_steps = [
-                {"action": "assess_current_position", "priority": 1},
-                {"action": "identify_unexplored_areas", "priority": 2},
-                {"action": "plan_exploration_route", "priority": 3},
-                {"action": "execute_movement", "priority": 4},
-                {"action": "report_findings", "priority": 5}
-            ]
-        elif "build" in goal.lower():
-            plan_steps = [
-                {"action": "analyze_build_location", "priority": 1},
-                {"action": "check_resources", "priority": 2},
-                {"action": "plan_construction", "priority": 3},
-                {"action": "execute_building", "priority": 4},
-                {"action": "verify_completion", "priority": 5}
-            ]
-        elif "coordinate" in goal.lower():
-            plan_steps = [
-                {"action": "gather_agent_status", "priority": 1},
-                {"action": "analyze_conflicts", "priority": 2},
-                {"action": "generate_solution", "priority": 3},
-                {"action": "communicate_plan", "priority": 4},
-                {"action": "monitor_execution", "priority": 5}
-            ]
-        
-        self.current_plan = plan_steps
+        goal_lower = goal.lower()
+        for keyword, template in _PLAN_TEMPLATES.items():
+            if keyword in goal_lower:
+                plan_steps = list(template)
+                break
+        
+        self.current_plan = deque(plan_steps)
         return plan_steps
     
     def execute_next_step(self) -> Optional[Dict]:
         """Get the next step to execute"""
         if self.current_plan:
-            next_step = self.current_plan.pop(0)
-            self.execution_log.append({
+            next_step = self.current_plan.popleft()
+            log_entry = {
                 "step": next_step,
                 "timestamp": time.time(),
                 "status": "executing"
-            })
+            }
+            # The bounded log drops its oldest entry on append; forget it here too
+            if len(self.execution_log) == self.execution_log.maxlen:
+                evicted = self.execution_log[0]
+                if self._log_by_step.get(id(evicted["step"])) is evicted:
+                    del self._log_by_step[id(evicted["step"])]
+            self.execution_log.append(log_entry)
+            self._log_by_step[id(next_step)] = log_entry
             return next_step
         return None
     
     def update_step_status(self, step: Dict, status: str, result: Any = None):
         """Update the status of an executed step"""
-        for log_entry in reversed(self.execution_log):
-            if log_entry["step"] == step:
-                log_entry["status"] = status
-                log_entry["result"] = result
-                log_entry["completed_at"] = time.time()
-                break
+        log_entry = self._log_by_step.get(id(step))
+        if log_entry is not None:
+            log_entry["status"] = status
+            log_entry["result"] = result
+            log_entry["completed_at"] = time.time()
+
+class NearDuplicateCache:
+    """Reuses decisions for situations that differ only slightly from one already answered
+
+    Decisions such as MOVE depend on where the agent stands, so the position and neighbouring
+    cells (the anchor) must match exactly; only the remaining context is compared by similarity.
+    """
+
+    def __init__(self, threshold: float = _LLM_SEMANTIC_THRESHOLD, max_entries: int = 256):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # Per role, most recent last: (anchor, word-bigram shingles, decision)
+        self._entries: Dict[str, deque] = {}
+
+    @staticmethod
+    def shingles(text: str) -> frozenset:
+        """Consecutive word pairs, so token order still counts towards similarity"""
+        tokens = _TOKEN_RE.findall(text.lower())
+        return frozenset(zip(tokens, islice(tokens, 1, None)))
+
+    def lookup(self, role: str, anchor: SituationAnchor, shingles: frozenset) -> Optional[str]:
+        """Return the decision for the most similar situation at the same anchor, above the threshold"""
+        entries = self._entries.get(role)
+        if not entries or not shingles:
+            return None
+        size = len(shingles)
+        best_score, best_decision = self.threshold, None
+        for cached_anchor, cached, decision in entries:
+            if cached_anchor != anchor:
+                continue
+            overlap = len(shingles & cached)
+            score = overlap / (size + len(cached) - overlap)
+            if score >= best_score:
+                best_score, best_decision = score, decision
+        return best_decision
+
+    def add(self, role: str, anchor: SituationAnchor, shingles: frozenset, decision: str):
+        """Remember the decision made for a situation"""
+        entries = self._entries.get(role)
+        if entries is None:
+            entries = self._entries[role] = deque(maxlen=self.max_entries)
+        entries.append((anchor, shingles, decision))
+
+    def clear(self):
+        """Forget every cached decision"""
+        self._entries.clear()
 
 class BaseAgent(ABC):
+    # Batches LLM requests across agents and caps how many are in flight
+    _dispatcher: Optional[BatchLLMDispatcher] = None
+    LLM_MAX_CONCURRENCY = _LLM_MAX_CONCURRENCY
+    # Role -> system prompt; a class-level constant so subclasses can override it
+    SYSTEM_PROMPTS: ClassVar[Mapping[str, str]] = SYSTEM_PROMPTS
+    # Exact-match prompt cache shared by all agents: key -> (stored_at, decision), oldest first
+    _response_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    # Fallback for prompts that miss the exact cache but describe nearly the same situation
+    _similar_responses = NearDuplicateCache()
+    # Requests currently with the API, keyed by prompt hash, so duplicates can wait on them
+    _inflight: Dict[str, asyncio.Future] = {}
+
     def __init__(self, agent_id: str, role: str, grid: Grid, 
                  coordination_manager: CoordinationManager = None,
                  shared_state: SharedState = None):
@@ -213,18 +437,16 @@ class BaseAgent(ABC):
         self.memory_system = MemorySystem()
         self.planning_system = PlanningSystem(agent_id)
         self.tools: Dict[str, BaseTool] = {}
-        self.capabilities: Set[str] = set()
+        # Capabilities are replaced, never mutated, so published snapshots stay valid
+        self._capabilities: frozenset = frozenset()
+        self._capability_list: List[str] = []
+        self._tool_names: List[str] = []
         
         # Performance tracking
-        self.performance_metrics = {
-            "actions_taken": 0,
-            "successful_actions": 0,
-            "messages_sent": 0,
-            "messages_received": 0,
-            "planning_cycles": 0,
-            "tool_usage": {},
-            "average_response_time": 0.0
-        }
+        self.perf = PerfMetrics()
+        
+        # (position, grid version, surroundings) from the last observation
+        self._observation_cache: Optional[Tuple[Tuple[int, int], int, List[NeighborCell]]] = None
         
         # Learning system
         self.learning_data = {
@@ -235,119 +457,57 @@ class BaseAgent(ABC):
         }
         
         # Initialize OpenAI client with better error handling
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            logger.error(f"OPENAI_API_KEY not found for agent {agent_id}")
+        if not OPENAI_API_KEY:
+            logger.error("OPENAI_API_KEY not found for agent %s", agent_id)
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
         try:
-            self.client = openai.OpenAI(api_key=api_key)
+            # Every agent shares one client and its connection pool
+            self.client = get_client()
             self._store_memory(f"Agent {agent_id} initialized successfully", MemoryType.EPISODIC, importance=0.8)
-            logger.info(f"OpenAI client initialized for agent {agent_id}")
+            logger.info("OpenAI client initialized for agent %s", agent_id)
         except Exception as e:
-            logger.error(f"Failed to initialize OpenAI client for {agent_id}: {e}")
+            logger.error("Failed to initialize OpenAI client for %s: %s", agent_id, e)
             raise
         
-        # Define enhanced role-specific system prompts
-        self.system_prompts = self._get_system_prompts()
-
-    def _get_system_prompts(self) -> Dict[str, str]:
-        """Get enhanced system prompts for different roles"""
-        return {
-            "scout": """You are an advanced Scout agent in a multi-agent grid-based simulation. 
-
-Your capabilities include:
-- Systematic exploration and mapping
-- Environmental reconnaissance and analysis
-- Pathfinding and navigation optimization
-- Intelligence gathering and reporting
-- Collaborative coordination with other agents
-
-Available tools and actions:
-- MOVE <direction>: Move in a direction (north, south, east, west)
-- OBSERVE: Get detailed information about surroundings
-- SCAN_AREA <radius>: Scan a wider area around current position
-- REPORT <message>: Send intelligence to other agents
-- REQUEST_RESOURCE <type> <amount>: Request resources from shared pool
-- PLAN <objective>: Create a multi-step plan for complex objectives
-
-Memory and learning:
-- Remember previously explored areas and their characteristics
-- Learn from successful exploration patterns
-- Adapt strategies based on environmental feedback
-- Coordinate with other agents to avoid redundant exploration
-
-Current objective: Conduct systematic exploration while optimizing for coverage and efficiency.
-Provide detailed reports to support strategic decision-making by other agents.
-Always respond with a single action in the specified format.""",
-
-            "builder": """You are an advanced Builder agent in a multi-agent grid-based simulation.
-
-Your capabilities include:
-- Construction planning and execution
-- Resource management and optimization
-- Quality control and verification
-- Collaborative building coordination
-- Infrastructure development
-
-Available tools and actions:
-- BUILD <x,y>: Construct a building at coordinates (x,y)
-- MOVE <direction>: Move in a direction (north, south, east, west)
-- CHECK_RESOURCES: Verify available construction materials
-- PLAN_CONSTRUCTION <objective>: Plan multi-step construction projects
-- REQUEST_RESOURCE <type> <amount>: Request materials from shared pool
-- COORDINATE_BUILD <message>: Coordinate with other agents on construction
-- INSPECT <x,y>: Inspect construction quality at location
-
-Memory and learning:
-- Remember successful construction patterns and locations
-- Learn optimal resource allocation strategies
-- Track construction efficiency metrics
-- Adapt building strategies based on environmental constraints
-
-Current objective: Execute construction projects efficiently while managing resources
-and coordinating with strategic planning from other agents.
-Always respond with a single action in the specified format.""",
-
-            "strategist": """You are an advanced Strategist agent in a multi-agent grid-based simulation.
-
-Your capabilities include:
-- Strategic planning and coordination
-- Resource allocation optimization
-- Multi-agent task coordination
-- Conflict resolution and mediation
-- Performance analysis and optimization
-
-Available tools and actions:
-- ANALYZE: Perform comprehensive situation analysis
-- SUGGEST_BUILD <x,y>: Recommend optimal building locations
-- COORDINATE <message>: Send coordination directives to other agents
-- ALLOCATE_RESOURCE <agent> <type> <amount>: Manage resource distribution
-- PLAN_MISSION <objective>: Create complex multi-agent mission plans
-- RESOLVE_CONFLICT <type>: Handle conflicts between agents
-- MONITOR_PROGRESS: Track mission progress and agent performance
-
-Memory and learning:
-- Remember successful coordination strategies
-- Learn from multi-agent interaction patterns
-- Track resource utilization efficiency
-- Adapt planning based on mission outcomes
-
-Current objective: Develop and execute strategic plans that optimize overall mission success
-through effective coordination and resource management.
-Always respond with a single action in the specified format."""
-        }
+        # Resolve the role's system prompt once; the system message never changes
+        self._system_prompt = self.SYSTEM_PROMPTS.get(role, "You are a helpful agent.")
+        self._system_message = {"role": "system", "content": self._system_prompt}
+        # Role/capabilities/tools part of the user prompt; rebuilt only when those change
+        self._refresh_prompt_profile()
+
+    def _refresh_prompt_profile(self):
+        """Rebuild the cached prompt section describing the agent's role, capabilities and tools"""
+        self._prompt_profile = (
+            f"- My capabilities: {self._capability_list}\n"
+            f"- Available tools: {self._tool_names}\n"
+            "\n"
+            f"Based on this comprehensive context and my role as {self.role}, what should I do next?\n"
+            "Consider my past experiences, current objectives, and available resources.\n"
+            "If I need to use a tool, specify it clearly in your response."
+        )
 
     def add_tool(self, tool: BaseTool):
         """Add a tool to the agent's toolkit"""
         self.tools[tool.name] = tool
-        logger.info(f"Added tool {tool.name} to agent {self.agent_id}")
+        self._tool_names = list(self.tools)
+        self._refresh_prompt_profile()
+        logger.info("Added tool %s to agent %s", tool.name, self.agent_id)
+
+    @property
+    def capabilities(self) -> frozenset:
+        """Current capabilities (an immutable snapshot)"""
+        return self._capabilities
 
     def add_capability(self, capability: str):
         """Add a capability to the agent"""
-        self.capabilities.add(capability)
+        if capability in self._capabilities:
+            return
+        self._capabilities = self._capabilities | {capability}
+        self._capability_list = sorted(self._capabilities)
+        self._refresh_prompt_profile()
         if self.shared_state:
-            self.shared_state.agent_capabilities[self.agent_id] = self.capabilities
+            self.shared_state.agent_capabilities[self.agent_id] = self._capabilities
 
     def use_tool(self, tool_name: str, **kwargs) -> ToolResult:
         """Use a specific tool"""
@@ -365,14 +525,15 @@ Always respond with a single action in the specified format."""
             
             # Update statistics
             self.tools[tool_name].update_stats(result.success)
-            self.performance_metrics["tool_usage"][tool_name] = \
-                self.performance_metrics["tool_usage"].get(tool_name, 0) + 1
+            tool_usage = self.perf.tool_usage
+            tool_usage[tool_name] = tool_usage.get(tool_name, 0) + 1
             
             # Store in memory
             self._store_memory(
                 f"Used tool {tool_name}: {'success' if result.success else 'failed'}",
                 MemoryType.SHORT_TERM,
                 importance=0.7 if result.success else 0.3,
+                kind=MemoryKind.TOOL,
                 tool_name=tool_name,
                 result=result.result
             )
@@ -390,13 +551,15 @@ Always respond with a single action in the specified format."""
             self.tools[tool_name].update_stats(False)
             return error_result
 
-    def _store_memory(self, content: str, memory_type: MemoryType, importance: float = 1.0, **metadata):
+    def _store_memory(self, content: str, memory_type: MemoryType, importance: float = 1.0,
+                      kind: MemoryKind = MemoryKind.NOTE, **metadata):
         """Store a memory entry"""
-        self.memory_system.store(content, memory_type, importance, **metadata)
+        self.memory_system.store(content, memory_type, importance, kind, **metadata)
 
-    def _retrieve_memories(self, query: str, memory_type: Optional[MemoryType] = None, limit: int = 5) -> List[MemoryEntry]:
+    def _retrieve_memories(self, query: str, memory_type: Optional[MemoryType] = None, limit: int = 5,
+                           exclude_kinds: Optional[Set[MemoryKind]] = None) -> List[MemoryEntry]:
         """Retrieve relevant memories"""
-        return self.memory_system.retrieve(query, memory_type, limit)
+        return self.memory_system.retrieve(query, memory_type, limit, exclude_kinds)
 
     def observe(self) -> Dict:
         """Enhanced observation with memory integration"""
@@ -404,21 +567,13 @@ Always respond with a single action in the specified format."""
         if not position:
             return {"location": None, "surroundings": []}
             
-        x, y = position
-        surroundings = []
-        
-        # Check adjacent cells with enhanced information
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nx, ny = x + dx, y + dy
-            if self.grid.is_within_bounds(nx, ny):
-                cell = self.grid.grid.get((nx, ny))
-                if cell:
-                    surroundings.append({
-                        "position": (nx, ny),
-                        "occupied_by": cell.occupied_by,
-                        "structure": cell.structure,
-                        "distance": abs(dx) + abs(dy)
-                    })
+        # Surroundings only change when the agent moves or the grid is mutated
+        cache = self._observation_cache
+        if cache is not None and cache[0] == position and cache[1] == self.grid.version:
+            surroundings = cache[2]
+        else:
+            surroundings = self._observe_surroundings(position)
+            self._observation_cache = (position, self.grid.version, surroundings)
 
         observation = {
             "location": position,
@@ -433,18 +588,90 @@ Always respond with a single action in the specified format."""
             f"Observed from {position}: {len(surroundings)} nearby cells",
             MemoryType.SHORT_TERM,
             importance=0.5,
+            kind=MemoryKind.OBSERVATION,
             position=position,
             surroundings_count=len(surroundings)
         )
         
         return observation
 
+    def _observe_surroundings(self, position: Tuple[int, int]) -> List[NeighborCell]:
+        """Describe the cells adjacent to a position"""
+        grid_cells = self.grid.grid
+        surroundings = []
+        for neighbor in self.grid.adjacent_positions(position):
+            cell = grid_cells[neighbor]
+            surroundings.append(NeighborCell(neighbor, cell.occupied_by, cell.structure))
+        return surroundings
+
     @abstractmethod
-    def step(self, messages: List[Message]) -> Optional[Message]:
+    async def step(self, messages: List[Message]) -> Optional[Message]:
         """Perform a single step in the simulation with enhanced decision making"""
         pass
 
-    def get_llm_decision(self, messages: List[Message], context: Dict = None) -> str:
+    @classmethod
+    def _get_dispatcher(cls) -> BatchLLMDispatcher:
+        """Get the dispatcher shared by all agents"""
+        if BaseAgent._dispatcher is None:
+            BaseAgent._dispatcher = BatchLLMDispatcher(
+                max_concurrency=cls.LLM_MAX_CONCURRENCY,
+                model=_DEFAULT_MODEL,
+                max_tokens=_MAX_TOKENS,
+                temperature=_TEMPERATURE,
+                stream=_LLM_STREAM
+            )
+        return BaseAgent._dispatcher
+
+    def _prompt_key(self, user_prompt: str) -> str:
+        """Hash everything that determines the completion"""
+        payload = f"{self._system_prompt}|{user_prompt}|{_DEFAULT_MODEL}|{_TEMPERATURE}|{_MAX_TOKENS}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @classmethod
+    def _get_cached_response(cls, key: str) -> Optional[str]:
+        """Return a cached decision if it is still fresh"""
+        cached = cls._response_cache.get(key)
+        if cached is None:
+            return None
+        stored_at, decision = cached
+        if time.time() - stored_at > _LLM_CACHE_TTL:
+            del cls._response_cache[key]
+            return None
+        cls._response_cache.move_to_end(key)
+        return decision
+
+    @classmethod
+    def _cache_response(cls, key: str, decision: str):
+        """Cache a decision, evicting the least recently used entry when full"""
+        cls._response_cache[key] = (time.time(), decision)
+        cls._response_cache.move_to_end(key)
+        if len(cls._response_cache) > _LLM_CACHE_SIZE:
+            cls._response_cache.popitem(last=False)
+
+    async def _request_decision(self, user_prompt: str, prompt_key: str) -> str:
+        """Ask the LLM, letting concurrent identical prompts wait on this request"""
+        future = asyncio.get_running_loop().create_future()
+        BaseAgent._inflight[prompt_key] = future
+        try:
+            content = await self._get_dispatcher().submit(
+                self.client,
+                [self._system_message, {"role": "user", "content": user_prompt}]
+            )
+            decision = content.strip()
+            if _LLM_CACHE:
+                self._cache_response(prompt_key, decision)
+            future.set_result(decision)
+            return decision
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            del BaseAgent._inflight[prompt_key]
+
+    async def get_llm_decision(self, messages: List[Message], context: Dict = None) -> str:
         """Enhanced LLM decision making with memory and planning"""
         try:
             start_time = time.time()
@@ -455,63 +682,80 @@ Always respond with a single action in the specified format."""
             
             # Retrieve relevant memories
             query = " ".join(recent_messages) if recent_messages else "current situation"
-            relevant_memories = self._retrieve_memories(query, limit=3)
+            # Past observations only repeat the situation the prompt already describes
+            relevant_memories = self._retrieve_memories(query, limit=3, exclude_kinds=_PROMPT_EXCLUDED_KINDS)
             memory_context = [m.content for m in relevant_memories]
             
             # Get current plan if any
             current_plan = self.planning_system.current_plan
             
             # Prepare comprehensive prompt
-            user_prompt = f"""Current situation analysis:
-                - My position: {observation['location']}
-                - Grid size: {observation['grid_size']}
-                - Nearby cells: {observation['surroundings']}
-                - Available resources: {observation.get('resources', {})}
-                - Recent messages: {recent_messages}
-                - Relevant memories: {memory_context}
-                - Current plan: {current_plan[:3] if current_plan else 'No active plan'}
-                - My capabilities: {list(self.capabilities)}
-                - Available tools: {list(self.tools.keys())}
-
-                Based on this comprehensive context and my role as {self.role}, what should I do next?
-                Consider my past experiences, current objectives, and available resources.
-                If I need to use a tool, specify it clearly in your response."""
-
-            response = self.client.chat.completions.create(
-                model=os.getenv("DEFAULT_MODEL", "gpt-3.5-turbo"),
-                messages=[
-                    {"role": "system", "content": self.system_prompts.get(self.role, "You are a helpful agent.")},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=int(os.getenv("MAX_TOKENS", 150)),
-                temperature=float(os.getenv("TEMPERATURE", 0.7))
-            )
+            prompt_values = {
+                "location": observation["location"],
+                "grid_size": observation["grid_size"],
+                "surroundings": observation["surroundings"],
+                "resources": observation.get("resources", {}),
+                "recent_messages": recent_messages,
+                "memory_context": memory_context,
+                "current_plan": list(islice(current_plan, 3)) if current_plan else "No active plan",
+            }
+            situation = SITUATION_TEMPLATE.format_map(prompt_values)
             
-            decision = response.choices[0].message.content.strip()
+            # Stay within the token budget: drop the oldest messages, then the least relevant memories
+            budget_chars = _PROMPT_TOKEN_BUDGET * _CHARS_PER_TOKEN - len(self._prompt_profile)
+            while len(situation) > budget_chars and (recent_messages or memory_context):
+                if recent_messages:
+                    recent_messages.pop(0)
+                else:
+                    memory_context.pop()
+                situation = SITUATION_TEMPLATE.format_map(prompt_values)
+            user_prompt = situation + self._prompt_profile
+
+            prompt_key = self._prompt_key(user_prompt)
+            decision = None
+            if _LLM_CACHE:
+                decision = self._get_cached_response(prompt_key)
+                if decision is None:
+                    # Position and neighbours must match exactly; the rest of the situation may vary slightly
+                    anchor = (observation["location"], tuple(observation["surroundings"]))
+                    situation_shingles = NearDuplicateCache.shingles(
+                        f"{prompt_values['resources']} {recent_messages} {memory_context} {prompt_values['current_plan']}"
+                    )
+                    decision = self._similar_responses.lookup(self.role, anchor, situation_shingles)
+            if decision is None:
+                inflight = self._inflight.get(prompt_key)
+                if inflight is not None:
+                    # An identical prompt is already with the API; callers arriving together share one sample
+                    decision = await asyncio.shield(inflight)
+                else:
+                    decision = await self._request_decision(user_prompt, prompt_key)
+                    if _LLM_CACHE:
+                        self._similar_responses.add(self.role, anchor, situation_shingles, decision)
             
             # Update performance metrics
             response_time = time.time() - start_time
-            self.performance_metrics["average_response_time"] = \
-                (self.performance_metrics["average_response_time"] + response_time) / 2
+            self.perf.average_response_time = (self.perf.average_response_time + response_time) / 2
             
             # Store decision in memory
             self._store_memory(
                 f"LLM decision: {decision}",
                 MemoryType.SHORT_TERM,
                 importance=0.6,
+                kind=MemoryKind.DECISION,
                 response_time=response_time,
                 context_size=len(user_prompt)
             )
             
-            logger.debug(f"Agent {self.agent_id} LLM decision: {decision}")
+            logger.debug("Agent %s LLM decision: %s", self.agent_id, decision)
             return decision
         
         except Exception as e:
-            logger.error(f"LLM error for {self.agent_id}: {e}")
+            logger.error("LLM error for %s: %s", self.agent_id, e)
             self._store_memory(
                 f"LLM call failed: {str(e)}",
                 MemoryType.SHORT_TERM,
                 importance=0.9,
+                kind=MemoryKind.ERROR,
                 error=str(e)
             )
             return "WAIT"  # Default fallback action
@@ -534,13 +778,14 @@ Always respond with a single action in the specified format."""
             self.coordination_manager.send_message(message)
         
         # Update performance metrics
-        self.performance_metrics["messages_sent"] += 1
+        self.perf.messages_sent += 1
         
         # Store in memory
         self._store_memory(
             f"Sent message: {content}",
             MemoryType.SHORT_TERM,
             importance=0.7,
+            kind=MemoryKind.MESSAGE,
             recipient=recipient,
             message_type=message_type.value
         )
@@ -555,32 +800,35 @@ Always respond with a single action in the specified format."""
             f"Status changed: {old_status} → {new_status}",
             MemoryType.EPISODIC,
             importance=0.6,
+            kind=MemoryKind.STATUS,
             old_status=old_status,
             new_status=new_status
         )
 
-    def learn_from_outcome(self, action: str, outcome: str, success: bool):
+    def learn_from_outcome(self, action: str, outcome: str, success: bool,
+                           capture_context: bool = False):
         """Learn from action outcomes"""
+        record = {
+            "action": action,
+            "outcome": outcome,
+            "timestamp": time.time(),
+            "position": self.grid.get_agent_position(self.agent_id)
+        }
+        # A full observation is only taken on request
+        if capture_context:
+            record["context"] = self.observe()
+        
         if success:
-            self.learning_data["successful_strategies"].append({
-                "action": action,
-                "outcome": outcome,
-                "timestamp": time.time(),
-                "context": self.observe()
-            })
+            self.learning_data["successful_strategies"].append(record)
         else:
-            self.learning_data["failed_strategies"].append({
-                "action": action,
-                "outcome": outcome,
-                "timestamp": time.time(),
-                "context": self.observe()
-            })
+            self.learning_data["failed_strategies"].append(record)
         
         # Store in long-term memory
         self._store_memory(
             f"Action outcome: {action} → {outcome} ({'success' if success else 'failure'})",
             MemoryType.LONG_TERM,
             importance=0.8 if success else 0.9,  # Failures are slightly more important to remember
+            kind=MemoryKind.OUTCOME,
             action=action,
             outcome=outcome,
             success=success
@@ -593,8 +841,8 @@ Always respond with a single action in the specified format."""
             "role": self.role,
             "status": self.status,
             "position": self.grid.get_agent_position(self.agent_id),
-            "capabilities": list(self.capabilities),
-            "available_tools": list(self.tools.keys())
+            "capabilities": self._capability_list,
+            "available_tools": self._tool_names
         }
         
         # Add memory summary
@@ -605,8 +853,8 @@ Always respond with a single action in the specified format."""
         
         base_status.update({
             "memory_summary": memory_summary,
-            "performance_metrics": self.performance_metrics.copy(),
-            "current_plan": self.planning_system.current_plan[:3],  # Show next 3 steps
+            "performance_metrics": self.perf.to_dict(),
+            "current_plan": list(islice(self.planning_system.current_plan, 3)),  # Show next 3 steps
             "learning_summary": {
                 "successful_strategies_count": len(self.learning_data["successful_strategies"]),
                 "failed_strategies_count": len(self.learning_data["failed_strategies"])
@@ -0,0 +1,142 @@
+# apps/backend/app/agents/batch_dispatcher.py
+
+from typing import List, Dict, Optional, Any, Tuple, Set
+import asyncio
+import logging
+from openai import AsyncStream
+
+logger = logging.getLogger(__name__)
+
+class BatchLLMDispatcher:
+    """Collects the LLM requests agents make in one event-loop tick and sends them together"""
+
+    def __init__(self, max_concurrency: int = 8, model: str = "gpt-3.5-turbo",
+                 max_tokens: int = 150, temperature: float = 0.7, stream: bool = False):
+        self.max_concurrency = max_concurrency
+        self.model = model
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        # Stream completions and stop reading after the first line (the action)
+        self.stream = stream
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[Any, List[Dict], asyncio.Future]] = []
+        self._flush_scheduled = False
+        # The loop only holds weak references to tasks, so keep flushes alive until they finish
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, client, messages: List[Dict]) -> str:
+        """Queue a chat completion and wait for its text"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((client, messages, future))
+        if not self._flush_scheduled:
+            # Flush on the next loop iteration, once every agent stepping concurrently has submitted
+            self._flush_scheduled = True
+            loop.call_soon(self._start_flush)
+        return await future
+
+    async def dispatch(self, client, prompts: List[List[Dict]]) -> List[str]:
+        """Send several chat completions as one batch and return their texts in order"""
+        return list(await asyncio.gather(*(self.submit(client, messages) for messages in prompts)))
+
+    def _start_flush(self):
+        """Hand the pending batch to a flush task"""
+        batch, self._pending = self._pending, []
+        self._flush_scheduled = False
+        task = asyncio.ensure_future(self._flush(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task):
+        """Release a finished flush task and log anything it raised"""
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error("LLM batch flush failed: %s", error, exc_info=error)
+
+    async def _flush(self, batch: List[Tuple[Any, List[Dict], asyncio.Future]]):
+        """Send a batch of requests concurrently and resolve their futures"""
+        results = await asyncio.gather(
+            *(self._complete(client, messages) for client, messages, _ in batch),
+            return_exceptions=True
+        )
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        if len(batch) > 1:
+            logger.debug("Dispatched %d LLM requests concurrently", len(batch))
+
+    async def _complete(self, client, messages: List[Dict]) -> str:
+        """Run one chat completion within the concurrency limit"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            # A semaphore binds to the first loop it waits on and raises RuntimeError on any other.
+            # The dispatcher is shared process-wide (BaseAgent._dispatcher), so it can outlive a loop:
+            # every asyncio.run() call, as in scripts and the test suite, starts a new one.
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        # Streamed responses only report usage when asked, in a final chunk with no choices
+        stream_kwargs = {"stream": True, "stream_options": {"include_usage": True}} if self.stream else {}
+        async with self._semaphore:
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                **stream_kwargs
+            )
+            if isinstance(response, AsyncStream):
+                return await self._read_first_line(response)
+        self._log_cached_tokens(getattr(response, "usage", None))
+        return response.choices[0].message.content
+
+    async def _read_first_line(self, stream: AsyncStream) -> str:
+        """Collect streamed text up to the first non-blank line, then abandon the rest of the stream"""
+        text = ""
+        drain = False
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    self._log_cached_tokens(getattr(chunk, "usage", None))
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    text += delta
+                    if "\n" in text.lstrip():
+                        # The usage chunk comes last; only wait for it when it would be logged
+                        drain = logger.isEnabledFor(logging.DEBUG)
+                        break
+        finally:
+            if drain:
+                task = asyncio.ensure_future(self._drain_usage(stream))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                await stream.close()
+        return text.lstrip().split("\n", 1)[0]
+
+    async def _drain_usage(self, stream: AsyncStream):
+        """Read an abandoned stream through to its usage chunk, off the caller's critical path"""
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    self._log_cached_tokens(getattr(chunk, "usage", None))
+        except Exception as e:
+            logger.debug("Could not read usage from LLM stream: %s", e)
+        finally:
+            await stream.close()
+
+    @staticmethod
+    def _log_cached_tokens(usage: Any):
+        """Log how much of the prompt OpenAI served from its prompt cache"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+        if cached_tokens:
+            logger.debug("Prompt cache served %s of %s prompt tokens", cached_tokens, usage.prompt_tokens)
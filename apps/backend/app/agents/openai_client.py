@@ -0,0 +1,23 @@
+# apps/backend/app/agents/openai_client.py
+
+from typing import Optional
+import os
+import openai
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+
+# One AsyncOpenAI client, and so one httpx connection pool, for the whole process
+_client: Optional[openai.AsyncOpenAI] = None
+
+def get_client() -> openai.AsyncOpenAI:
+    """Get the shared AsyncOpenAI client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            max_retries=_MAX_RETRIES,
+            timeout=_TIMEOUT
+        )
+    return _client
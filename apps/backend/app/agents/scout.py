@@ -1,64 +1,98 @@
 # Fix for apps/backend/app/agents/scout.py
 
-import random
 import logging
+from collections import deque
 from typing import Optional
-from .base import BaseAgent, MemoryType
+from .base import BaseAgent, MemoryType, MemoryKind
 from app.tools.message import Message
 from app.env.grid import Grid
 
 logger = logging.getLogger(__name__)
 
+# Exploration priority order: right, down, left, up
+_DIRECTIONS = (("east", 1, 0), ("south", 0, 1), ("west", -1, 0), ("north", 0, -1))
+_DIR_MAP = {name: (dx, dy) for name, dx, dy in _DIRECTIONS}
+# Offset -> (priority, direction), to walk the grid's neighbor lists in exploration order
+_OFFSET_DIRECTIONS = {(dx, dy): (rank, name) for rank, (name, dx, dy) in enumerate(_DIRECTIONS)}
+# How many of the latest visited cells the status reports
+_RECENT_CELLS_LIMIT = 10
+
 class ScoutAgent(BaseAgent):
     def __init__(self, agent_id: str, grid: Grid):
         super().__init__(agent_id, "scout", grid)
-        self.exploration_pattern = []
         self.visited_cells = set()
+        self.recent_cells = deque(maxlen=_RECENT_CELLS_LIMIT)  # Latest visited cells, oldest first
+        # The grid never resizes, so its cell count is fixed for the scout's lifetime
+        self._total_cells = grid.width * grid.height
+        self._percent_per_cell = 100.0 / self._total_cells
+        # LLM action keyword -> handler taking the rest of the action line
+        self._action_dispatch = {
+            "MOVE": self._handle_move,
+            "OBSERVE": lambda _: self._observe_and_report(),
+            "REPORT": self._handle_report
+        }
         self.update_status("Ready for exploration")
         
         # Mark starting position as visited immediately
         starting_pos = self.grid.get_agent_position(self.agent_id)
         if starting_pos:
-            self.visited_cells.add(starting_pos)
-            logger.info(f"Scout initialized at {starting_pos}, marked as visited")
+            self._mark_visited(starting_pos)
+            logger.info("Scout initialized at %s, marked as visited", starting_pos)
         
-    def step(self, messages: list[Message]) -> Optional[Message]:
+    async def step(self, messages: list[Message]) -> Optional[Message]:
         """Scout explores the grid systematically"""
-        logger.info(f"Scout step starting - current position: {self.grid.get_agent_position(self.agent_id)}")
-        
+        return self.apply(await self.plan(messages))
+
+    async def plan(self, messages: list[Message]) -> Optional[str]:
+        """Ask the LLM for the next action without touching the grid; None if the decision failed
+
+        Orchestrators can gather plan() across several scouts so their LLM calls overlap,
+        then call apply() one scout at a time to keep grid mutation sequential.
+        """
         # Mark current position as visited
         current_pos = self.grid.get_agent_position(self.agent_id)
+        logger.debug("Scout step starting - current position: %s", current_pos)
         if current_pos:
-            self.visited_cells.add(current_pos)
-            logger.info(f"Scout marked position {current_pos} as visited. Total visited: {len(self.visited_cells)}")
+            self._mark_visited(current_pos)
+            logger.debug("Scout marked position %s as visited. Total visited: %s", current_pos, len(self.visited_cells))
         
-        # Try LLM decision first, with fallback to deterministic behavior
         try:
-            llm_action = self.get_llm_decision(messages)
-            logger.info(f"Scout LLM decision: {llm_action}")
-            
-            # Parse and execute action
-            action_parts = llm_action.split()
-            if action_parts:
-                action = action_parts[0].upper()
-                
-                if action == "MOVE" and len(action_parts) > 1:
-                    direction = action_parts[1].lower()
-                    result = self._move(direction)
+            llm_action = await self.get_llm_decision(messages)
+        except Exception as e:
+            logger.warning("Scout LLM decision failed: %s, using fallback behavior", e)
+            self._store_memory(f"LLM failed, using fallback", MemoryType.SHORT_TERM, kind=MemoryKind.ERROR)
+            return None
+        logger.info("Scout LLM decision: %s", llm_action)
+        return llm_action
+
+    def apply(self, llm_action: Optional[str]) -> Optional[Message]:
+        """Execute a planned LLM action, falling back to systematic exploration"""
+        if llm_action is not None:
+            try:
+                # Parse and execute action
+                words = llm_action.split(maxsplit=1)
+                handler = self._action_dispatch.get(words[0].upper()) if words else None
+                if handler:
+                    result = handler(words[1] if len(words) > 1 else "")
                     if result:
                         return result
-                elif action == "OBSERVE":
-                    return self._observe_and_report()
-                elif action == "REPORT" and len(action_parts) > 1:
-                    report_content = " ".join(action_parts[1:])
-                    return self._send_report(report_content)
-        except Exception as e:
-            logger.warning(f"Scout LLM decision failed: {e}, using fallback behavior")
-            self._store_memory(f"LLM failed, using fallback", MemoryType.SHORT_TERM)
+            except Exception as e:
+                logger.warning("Scout action %r failed: %s, using fallback behavior", llm_action, e)
+                self._store_memory(f"Action failed, using fallback", MemoryType.SHORT_TERM, kind=MemoryKind.ERROR)
         
         # Fallback to systematic exploration
         return self._systematic_exploration()
 
+    def _handle_move(self, argument: str) -> Optional[Message]:
+        """Handle a "MOVE <direction>" action"""
+        words = argument.split(maxsplit=1)
+        return self._move(words[0].lower()) if words else None
+
+    def _handle_report(self, argument: str) -> Optional[Message]:
+        """Handle a "REPORT <content>" action"""
+        content = " ".join(argument.split())
+        return self._send_report(content) if content else None
+
     def _systematic_exploration(self) -> Optional[Message]:
         """Systematic exploration with guaranteed movement"""
         current_pos = self.grid.get_agent_position(self.agent_id)
@@ -67,88 +101,75 @@ class ScoutAgent(BaseAgent):
             return None
             
         x, y = current_pos
-        logger.info(f"Scout systematic exploration from ({x}, {y})")
-        
-        # Priority order for exploration: right, down, left, up
-        exploration_directions = [
-            ("east", (1, 0)),
-            ("south", (0, 1)), 
-            ("west", (-1, 0)),
-            ("north", (0, -1))
-        ]
-        
-        # First, try to move to an unvisited adjacent cell
-        for direction_name, (dx, dy) in exploration_directions:
-            new_x, new_y = x + dx, y + dy
-            
-            if (self.grid.is_within_bounds(new_x, new_y) and 
-                self.grid.is_empty(new_x, new_y) and 
-                (new_x, new_y) not in self.visited_cells):
-                
-                logger.info(f"Scout moving {direction_name} to unvisited cell ({new_x}, {new_y})")
-                return self._move(direction_name)
-        
-        # If no unvisited cells, move to any available adjacent cell
-        for direction_name, (dx, dy) in exploration_directions:
-            new_x, new_y = x + dx, y + dy
-            
-            if (self.grid.is_within_bounds(new_x, new_y) and 
-                self.grid.is_empty(new_x, new_y)):
-                
-                logger.info(f"Scout moving {direction_name} to visited cell ({new_x}, {new_y})")
-                return self._move(direction_name)
+        logger.debug("Scout systematic exploration from (%s, %s)", x, y)
+        
+        # Prefer an unvisited adjacent cell, otherwise any available one, in a single pass
+        moves = sorted(
+            (_OFFSET_DIRECTIONS[(nx - x, ny - y)], (nx, ny))
+            for nx, ny in self.grid.adjacent_positions(current_pos)
+            if self.grid.is_empty(nx, ny)
+        )
+        visited = self.visited_cells
+        fallback = None
+        for (_, direction_name), neighbor in moves:
+            if neighbor not in visited:
+                logger.info("Scout moving %s to unvisited cell %s", direction_name, neighbor)
+                return self._move(direction_name, current_pos)
+            if fallback is None:
+                fallback = (direction_name, neighbor)
+        
+        if fallback:
+            direction_name, neighbor = fallback
+            logger.info("Scout moving %s to visited cell %s", direction_name, neighbor)
+            return self._move(direction_name, current_pos)
         
         # If can't move anywhere, report current status
         logger.info("Scout cannot move, sending observation report")
         return self._observe_and_report()
 
-    def _move(self, direction: str) -> Optional[Message]:
-        """Move in specified direction."""
-        direction_map = {
-            "north": (0, -1),
-            "south": (0, 1),
-            "east": (1, 0),
-            "west": (-1, 0)
-        }
-        
-        if direction not in direction_map:
-            logger.warning(f"Invalid direction: {direction}")
+    def _move(self, direction: str, current_pos: Optional[tuple[int, int]] = None) -> Optional[Message]:
+        """Move in specified direction from current_pos, looked up when the caller doesn't have it."""
+        offset = _DIR_MAP.get(direction)
+        if offset is None:
+            logger.warning("Invalid direction: %s", direction)
             return None
             
-        current_pos = self.grid.get_agent_position(self.agent_id)
+        if current_pos is None:
+            current_pos = self.grid.get_agent_position(self.agent_id)
         if not current_pos:
             logger.error("Scout has no current position for movement")
             return None
             
-        dx, dy = direction_map[direction]
+        dx, dy = offset
         new_x, new_y = current_pos[0] + dx, current_pos[1] + dy
         
-        logger.info(f"Scout attempting to move {direction} from {current_pos} to ({new_x}, {new_y})")
+        logger.debug("Scout attempting to move %s from %s to (%s, %s)", direction, current_pos, new_x, new_y)
         
         if self.grid.is_within_bounds(new_x, new_y) and self.grid.is_empty(new_x, new_y):
             success = self.grid.move_agent(self.agent_id, (new_x, new_y))
             if success:
                 # Mark new position as visited
-                self.visited_cells.add((new_x, new_y))
+                self._mark_visited((new_x, new_y))
                 self.update_status(f"Moved {direction} to ({new_x}, {new_y})")
                 
                 # Add detailed movement to memory
-                self._store_memory(f"Moved {direction}: ({current_pos[0]},{current_pos[1]}) → ({new_x},{new_y})", MemoryType.SHORT_TERM)
+                self._store_memory(f"Moved {direction}: ({current_pos[0]},{current_pos[1]}) → ({new_x},{new_y})", MemoryType.SHORT_TERM, kind=MemoryKind.OUTCOME)
                 
                 # Update exploration progress
-                exploration_percentage = (len(self.visited_cells) / (self.grid.width * self.grid.height)) * 100
+                exploration_percentage = self._exploration_percent()
                 
                 message = f"SCOUT_REPORT: Moved {direction} to ({new_x}, {new_y}) - continuing exploration ({exploration_percentage:.1f}% complete)"
-                logger.info(f"Scout move successful: {message}")
-                logger.info(f"Scout has now visited {len(self.visited_cells)} cells: {sorted(list(self.visited_cells))}")
+                logger.info("Scout move successful: %s", message)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Scout has now visited %d cells: %s", len(self.visited_cells), sorted(self.visited_cells))
                 
                 return self.send_message(message)
             else:
-                logger.warning(f"Scout move failed - grid.move_agent returned False")
+                logger.warning("Scout move failed - grid.move_agent returned False")
                 self.update_status(f"Move {direction} failed")
                 return None
         else:
-            logger.warning(f"Scout cannot move {direction} - blocked or out of bounds")
+            logger.warning("Scout cannot move %s - blocked or out of bounds", direction)
             self.update_status(f"Cannot move {direction} - blocked")
             return None
 
@@ -159,21 +180,25 @@ class ScoutAgent(BaseAgent):
         
         # Mark current position as visited
         if current_pos:
-            self.visited_cells.add(current_pos)
-        
-        findings = []
-        for cell in observation["surroundings"]:
-            if cell["structure"]:
-                findings.append(f"Structure at {cell['position']}")
-            if cell["occupied_by"] and cell["occupied_by"] != self.agent_id:
-                findings.append(f"Agent {cell['occupied_by']} at {cell['position']}")
+            self._mark_visited(current_pos)
+        
+        my_id = self.agent_id
+        findings = [
+            finding
+            for position, occupied_by, structure in observation["surroundings"]
+            for finding in (
+                structure and f"Structure at {position}",
+                occupied_by and occupied_by != my_id and f"Agent {occupied_by} at {position}"
+            )
+            if finding
+        ]
         
         visited_count = len(self.visited_cells)
-        total_cells = self.grid.width * self.grid.height
-        exploration_percent = (visited_count / total_cells) * 100
+        total_cells = self._total_cells
+        exploration_percent = self._exploration_percent()
         
         # Add observation to memory
-        self._store_memory(f"Observed from {current_pos}: {len(findings)} findings", MemoryType.SHORT_TERM)
+        self._store_memory(f"Observed from {current_pos}: {len(findings)} findings", MemoryType.SHORT_TERM, kind=MemoryKind.OBSERVATION)
         
         if findings:
             report = f"SCOUT_REPORT: At {current_pos}, found: {'; '.join(findings)}. Progress: {exploration_percent:.1f}% ({visited_count}/{total_cells})"
@@ -181,38 +206,46 @@ class ScoutAgent(BaseAgent):
             report = f"SCOUT_REPORT: At {current_pos}, area clear. Exploration: {exploration_percent:.1f}% ({visited_count}/{total_cells})"
             
         self.update_status("Observing and reporting")
-        logger.info(f"Scout observation report: {report}")
-        logger.info(f"Scout visited cells: {sorted(list(self.visited_cells))}")
+        logger.info("Scout observation report: %s", report)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Scout visited cells: %s", sorted(self.visited_cells))
         
         return self.send_message(report)
 
     def _send_report(self, content: str) -> Optional[Message]:
         """Send a custom report message."""
         self.update_status("Sending custom report")
-        self._store_memory(f"Custom report: {content[:30]}...", MemoryType.SHORT_TERM)
+        self._store_memory(f"Custom report: {content[:30]}...", MemoryType.SHORT_TERM, kind=MemoryKind.MESSAGE)
         
         # Include exploration progress in custom reports
-        visited_count = len(self.visited_cells)
-        total_cells = self.grid.width * self.grid.height
-        exploration_percent = (visited_count / total_cells) * 100
+        exploration_percent = self._exploration_percent()
         
         report_msg = f"SCOUT_REPORT: {content} (Progress: {exploration_percent:.1f}%)"
-        logger.info(f"Scout custom report: {report_msg}")
+        logger.info("Scout custom report: %s", report_msg)
         return self.send_message(report_msg)
 
-    def get_status(self) -> dict:
-        """Get scout status with exploration metrics."""
+    def _mark_visited(self, position: tuple[int, int]):
+        """Record a visit, keeping the recent list free of back-to-back repeats"""
+        self.visited_cells.add(position)
+        if not self.recent_cells or self.recent_cells[-1] != position:
+            self.recent_cells.append(position)
+
+    def _exploration_percent(self) -> float:
+        """Percentage of the grid's cells this scout has visited"""
+        return len(self.visited_cells) * self._percent_per_cell
+
+    def get_status(self, debug: bool = False) -> dict:
+        """Get scout status with exploration metrics; debug lists every visited cell instead of the latest few."""
         base_status = super().get_status()
         
         # Calculate exploration metrics
         visited_count = len(self.visited_cells)
-        total_cells = self.grid.width * self.grid.height
-        exploration_percentage = (visited_count / total_cells) * 100
+        exploration_percentage = self._exploration_percent()
         
         base_status.update({
             "cells_visited": visited_count,
             "exploration_percentage": exploration_percentage,
             "mission_role": "Explorer & Intelligence Gatherer",
-            "visited_cells_list": sorted(list(self.visited_cells))  # For debugging
+            "visited_cells_list": sorted(self.visited_cells) if debug else list(self.recent_cells)
         })
         return base_status
\ No newline at end of file
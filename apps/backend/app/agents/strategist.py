@@ -1,4 +1,6 @@
 from typing import Optional
+from collections import deque
+import heapq
 import re
 from .base import BaseAgent
 from app.tools.message import Message
@@ -7,36 +9,67 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Offsets within Manhattan distance 3 of the builder, nearest rings first, each listed once
+_BUILDER_OFFSETS = tuple(dict.fromkeys(
+    (dx, dy)
+    for radius in range(1, 4)
+    for dx in range(-radius, radius + 1)
+    for dy in range(-radius, radius + 1)
+    if abs(dx) + abs(dy) <= radius
+))
+
+_SCOUT_REPORT_HISTORY = 256
+
+# Scout report position formats, most specific first ("Moved east to (x, y)", "At (x, y), ...")
+_SCOUT_POSITION_PATTERNS = (
+    re.compile(r'to \((\d+),\s*(\d+)\)'),
+    re.compile(r'At \((\d+),\s*(\d+)\)'),
+    re.compile(r'\((\d+),\s*(\d+)\)')
+)
+
 class StrategistAgent(BaseAgent):
     def __init__(self, agent_id: str, grid: Grid):
         super().__init__(agent_id, "strategist", grid)
         self.suggested_locations = set()
-        self.scout_reports = []
+        # Only recent reports are kept; scout_reports_received counts every report ever seen
+        self.scout_reports = deque(maxlen=_SCOUT_REPORT_HISTORY)
+        self.scout_reports_received = 0
+        self._scout_positions = deque(maxlen=_SCOUT_REPORT_HISTORY)  # Parsed once per report, oldest first
         self.analysis_count = 0
         self.BUILD_TARGET = 5  # Stop at 5 buildings as per mission
+        # The grid never resizes, so its center and the center-distance scale are fixed
+        self._center = ((grid.width - 1) // 2, (grid.height - 1) // 2)
+        self._max_distance = max(grid.width, grid.height)
+        self._coverage_positions = self._build_coverage_positions()
+        # Location values stay valid until the builder moves, a scout reports or a structure is placed
+        self._value_cache: dict[tuple[int, int], float] = {}
+        self._value_cache_key = None
+        self._structure_positions: set[tuple[int, int]] = set()
 
-    def step(self, messages: list[Message]) -> Optional[Message]:
+    async def step(self, messages: list[Message]) -> Optional[Message]:
         """
         Strategist analyzes scout reports and gives strategic build orders.
         """
         # Process scout reports
         new_scout_reports = 0
         for message in messages:
-            if hasattr(message, 'sender') and message.sender == "scout" and "SCOUT_REPORT" in message.content:
+            if isinstance(message, Message) and message.sender == "scout" and "SCOUT_REPORT" in message.content:
                 self.scout_reports.append(message.content)
+                self._record_scout_position(message.content)
                 new_scout_reports += 1
+        self.scout_reports_received += new_scout_reports
         
         self.analysis_count += 1
         
         # Get current buildings count
         buildings_built = self._count_buildings()
         
-        logger.info(f"Strategist step {self.analysis_count}: {new_scout_reports} new scout reports, {buildings_built} buildings built")
-        logger.info(f"Grid dimensions: {self.grid.width}x{self.grid.height} (0-{self.grid.width-1}, 0-{self.grid.height-1})")
+        logger.info("Strategist step %s: %s new scout reports, %s buildings built", self.analysis_count, new_scout_reports, buildings_built)
+        logger.info("Grid dimensions: %sx%s (0-%s, 0-%s)", self.grid.width, self.grid.height, self.grid.width-1, self.grid.height-1)
         
         # IMPORTANT: Stop building when we reach the target
         if buildings_built >= self.BUILD_TARGET:
-            logger.info(f"Mission complete: {buildings_built} buildings built (target: {self.BUILD_TARGET})")
+            logger.info("Mission complete: %s buildings built (target: %s)", buildings_built, self.BUILD_TARGET)
             self.status = f"Mission complete: {buildings_built}/{self.BUILD_TARGET} buildings"
             return self.send_message(f"MISSION_COMPLETE: Target of {self.BUILD_TARGET} buildings achieved! Total built: {buildings_built}")
         
@@ -58,8 +91,8 @@ class StrategistAgent(BaseAgent):
         
         optimal_locations = self._find_optimal_building_locations(builder_pos)
         
-        logger.info(f"Found {len(optimal_locations)} optimal locations: {optimal_locations}")
-        logger.info(f"Builder is at: {builder_pos}")
+        logger.info("Found %s optimal locations: %s", len(optimal_locations), optimal_locations)
+        logger.info("Builder is at: %s", builder_pos)
         
         for location in optimal_locations:
             x, y = location
@@ -71,7 +104,7 @@ class StrategistAgent(BaseAgent):
                 distance_to_builder = abs(x - builder_pos[0]) + abs(y - builder_pos[1]) if builder_pos else "unknown"
                 self.status = f"Ordered build at ({x}, {y}) - distance {distance_to_builder}"
                 order = f"STRATEGIC_BUILD_ORDER: Build at ({x}, {y}) - high strategic value location"
-                logger.info(f"Strategist issuing build order: {order}")
+                logger.info("Strategist issuing build order: %s", order)
                 return self.send_message(order)
         
         # If no optimal locations, analyze situation
@@ -82,50 +115,52 @@ class StrategistAgent(BaseAgent):
         """Find strategically optimal locations for buildings that are actually valid."""
         candidates = []
         
-        logger.info(f"Finding optimal locations on {self.grid.width}x{self.grid.height} grid")
-        logger.info(f"Valid coordinates: x=0-{self.grid.width-1}, y=0-{self.grid.height-1}")
+        logger.info("Finding optimal locations on %sx%s grid", self.grid.width, self.grid.height)
+        logger.info("Valid coordinates: x=0-%s, y=0-%s", self.grid.width-1, self.grid.height-1)
         
         # Get scout's explored areas to prioritize building in explored regions
         scout_positions = self._get_scout_explored_areas()
-        logger.info(f"Scout has explored areas around: {scout_positions}")
+        logger.info("Scout has explored areas around: %s", scout_positions)
         
         # Calculate actual center coordinates (properly bounded)
-        center_x = (self.grid.width - 1) // 2
-        center_y = (self.grid.height - 1) // 2
+        center_x, center_y = self._center
         
-        logger.info(f"Grid center calculated as: ({center_x}, {center_y})")
-        logger.info(f"Builder position: {builder_pos}")
+        logger.info("Grid center calculated as: (%s, %s)", center_x, center_y)
+        logger.info("Builder position: %s", builder_pos)
         
         # Define strategic positions relative to builder, scout exploration, and grid center
-        strategic_positions = []
+        # (an insertion-ordered dict, so re-adding a position keeps its first, higher-priority slot)
+        strategic_positions: dict[tuple[int, int], None] = {}
         
         # PRIORITY 1: Locations near builder (within 3 steps)
         if builder_pos:
             bx, by = builder_pos
-            for radius in range(1, 4):  # 1-3 steps away
-                for dx in range(-radius, radius + 1):
-                    for dy in range(-radius, radius + 1):
-                        if abs(dx) + abs(dy) <= radius:  # Manhattan distance
-                            x, y = bx + dx, by + dy
-                            if self.grid.is_within_bounds(x, y):
-                                strategic_positions.append((x, y))
+            for dx, dy in _BUILDER_OFFSETS:
+                x, y = bx + dx, by + dy
+                if self.grid.is_within_bounds(x, y):
+                    strategic_positions[(x, y)] = None
         
         # PRIORITY 2: Locations near scout exploration
         for scout_x, scout_y in scout_positions[:5]:  # Top 5 scout positions
             for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1), (0, 0)]:
                 x, y = scout_x + dx, scout_y + dy
-                if (self.grid.is_within_bounds(x, y) and 
-                    (x, y) not in strategic_positions):
-                    strategic_positions.append((x, y))
+                if self.grid.is_within_bounds(x, y):
+                    strategic_positions[(x, y)] = None
         
         # PRIORITY 3: Center positions
         for dx, dy in [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]:
             x, y = center_x + dx, center_y + dy
-            if (self.grid.is_within_bounds(x, y) and 
-                (x, y) not in strategic_positions):
-                strategic_positions.append((x, y))
+            if self.grid.is_within_bounds(x, y):
+                strategic_positions[(x, y)] = None
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Strategic positions to evaluate: %s", list(strategic_positions)[:10])  # Log first 10
         
-        logger.info(f"Strategic positions to evaluate: {strategic_positions[:10]}")  # Log first 10
+        cache_key = (builder_pos, self.scout_reports_received, self.grid.structures_version)
+        if cache_key != self._value_cache_key:
+            self._value_cache = {}
+            self._value_cache_key = cache_key
+            self._structure_positions = {pos for pos, cell in self.grid.grid.items() if cell.structure}
         
         # Filter and evaluate valid strategic positions
         for x, y in strategic_positions:
@@ -133,41 +168,34 @@ class StrategistAgent(BaseAgent):
                 self.grid.is_empty(x, y) and 
                 (x, y) not in self.suggested_locations):
                 
-                value = self._calculate_location_value(x, y, scout_positions, builder_pos)
+                value = self._value_cache.get((x, y))
+                if value is None:
+                    value = self._calculate_location_value(x, y, scout_positions, builder_pos, self._structure_positions)
+                    self._value_cache[(x, y)] = value
                 candidates.append(((x, y), value))
-                logger.debug(f"Strategic position ({x}, {y}) has value {value}")
+                logger.debug("Strategic position (%s, %s) has value %s", x, y, value)
         
-        # Sort by strategic value (higher is better)
-        candidates.sort(key=lambda item: item[1], reverse=True)
+        # Keep only the highest strategic values (ties stay in evaluation order, as with a stable sort)
+        top_candidates = heapq.nlargest(5, candidates, key=lambda item: item[1])
         
-        logger.info(f"Final candidates (top 5): {candidates[:5]}")
+        logger.info("Final candidates (top 5): %s", top_candidates)
         
         # Return top 3 locations
-        return [location for location, value in candidates[:3]]
+        return [location for location, value in top_candidates[:3]]
+
+    def _record_scout_position(self, report: str):
+        """Parse the scout position out of a report as it arrives."""
+        for pattern in _SCOUT_POSITION_PATTERNS:
+            match = pattern.search(report)
+            if match:
+                x, y = int(match.group(1)), int(match.group(2))
+                if self.grid.is_within_bounds(x, y):
+                    self._scout_positions.append((x, y))
+                break
 
     def _get_scout_explored_areas(self) -> list[tuple[int, int]]:
-        """Extract scout positions from scout reports."""
-        scout_positions = []
-        
-        for report in self.scout_reports:
-            # Parse scout reports for position information
-            patterns = [
-                r'to \((\d+),\s*(\d+)\)',
-                r'At \((\d+),\s*(\d+)\)',
-                r'\((\d+),\s*(\d+)\)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, report)
-                if match:
-                    x, y = int(match.group(1)), int(match.group(2))
-                    if self.grid.is_within_bounds(x, y):
-                        scout_positions.append((x, y))
-                    break
-        
-        # Remove duplicates and sort by recency (most recent first)
-        scout_positions = list(dict.fromkeys(reversed(scout_positions)))
-        return scout_positions
+        """Scout positions from scout reports, deduplicated, most recent first."""
+        return list(dict.fromkeys(reversed(self._scout_positions)))
 
     def _strategic_placement(self) -> Optional[Message]:
         """Strategic placement for mid-game."""
@@ -182,7 +210,7 @@ class StrategistAgent(BaseAgent):
                 self.suggested_locations.add((x, y))
                 self.status = f"Strategic placement at ({x}, {y})"
                 order = f"STRATEGIC_BUILD_ORDER: Build at ({x}, {y}) - optimal coverage position"
-                logger.info(f"Strategist strategic placement: {order}")
+                logger.info("Strategist strategic placement: %s", order)
                 return self.send_message(order)
         
         # Fallback to regular build order
@@ -204,96 +232,86 @@ class StrategistAgent(BaseAgent):
                 self.suggested_locations.add((x, y))
                 self.status = f"Final build at ({x}, {y})"
                 order = f"STRATEGIC_BUILD_ORDER: Build at ({x}, {y}) - mission completion"
-                logger.info(f"Strategist final build order: {order}")
+                logger.info("Strategist final build order: %s", order)
                 return self.send_message(order)
         
         return self._coordinate_agents("Mission nearing completion, maintain current positions")
 
+    def _build_coverage_positions(self) -> tuple[tuple[int, int], ...]:
+        """In-bounds positions in expanding squares around the grid center, each listed once"""
+        center_x, center_y = self._center
+        max_radius = min(self.grid.width, self.grid.height) // 2
+        positions = dict.fromkeys(
+            (center_x + dx, center_y + dy)
+            for radius in range(1, max_radius + 1)
+            for dx in range(-radius, radius + 1)
+            for dy in range(-radius, radius + 1)
+        )
+        return tuple(pos for pos in positions if self.grid.is_within_bounds(*pos))
+
     def _find_coverage_location(self, builder_pos: Optional[tuple[int, int]]) -> Optional[tuple[int, int]]:
         """Find location that provides good coverage, preferring locations near builder."""
-        candidates = []
-        
-        center_x = (self.grid.width - 1) // 2
-        center_y = (self.grid.height - 1) // 2
+        best = None
+        best_distance = None
         
         # Look for positions in expanding radius from center, but prioritize near builder
-        max_radius = min(self.grid.width, self.grid.height) // 2
-        for radius in range(1, max_radius + 1):
-            for dx in range(-radius, radius + 1):
-                for dy in range(-radius, radius + 1):
-                    x, y = center_x + dx, center_y + dy
-                    if (self.grid.is_within_bounds(x, y) and 
-                        self.grid.is_empty(x, y) and
-                        (x, y) not in self.suggested_locations):
-                        
-                        # Calculate distance to builder
-                        builder_distance = 999
-                        if builder_pos:
-                            builder_distance = abs(x - builder_pos[0]) + abs(y - builder_pos[1])
-                        
-                        candidates.append((x, y, builder_distance))
-        
-        # Sort by builder distance (closer is better)
-        candidates.sort(key=lambda item: item[2])
-        
-        return candidates[0][:2] if candidates else None
+        for x, y in self._coverage_positions:
+            if self.grid.is_empty(x, y) and (x, y) not in self.suggested_locations:
+                
+                # Calculate distance to builder; on ties the innermost position wins
+                builder_distance = 999
+                if builder_pos:
+                    builder_distance = abs(x - builder_pos[0]) + abs(y - builder_pos[1])
+                
+                if best is None or builder_distance < best_distance:
+                    best, best_distance = (x, y), builder_distance
+        
+        return best
 
     def _find_remaining_build_spots(self, builder_pos: Optional[tuple[int, int]]) -> list[tuple[int, int]]:
         """Find remaining good spots for building, prioritizing near builder."""
         spots = []
-        for x in range(self.grid.width):
-            for y in range(self.grid.height):
-                if (self.grid.is_empty(x, y) and 
-                    (x, y) not in self.suggested_locations):
-                    
-                    # Calculate distance to builder
-                    builder_distance = 999
-                    if builder_pos:
-                        builder_distance = abs(x - builder_pos[0]) + abs(y - builder_pos[1])
-                    
-                    spots.append((x, y, builder_distance))
-        
-        # Sort by distance to builder (closer first)
-        spots.sort(key=lambda item: item[2])
-        return [(x, y) for x, y, _ in spots]
+        for x, y in self.grid.empty_cells():
+            if (x, y) not in self.suggested_locations:
+                
+                # Calculate distance to builder
+                builder_distance = 999
+                if builder_pos:
+                    builder_distance = abs(x - builder_pos[0]) + abs(y - builder_pos[1])
+                
+                spots.append((builder_distance, x, y))
+        
+        # Sort by distance to builder (closer first), then row-major as the old full scan did
+        spots.sort()
+        return [(x, y) for _, x, y in spots]
 
     def _count_buildings(self) -> int:
         """Count existing buildings on the grid."""
-        count = 0
-        for cell in self.grid.grid.values():
-            if cell.structure and cell.structure != "scanned":
-                count += 1
-        return count
+        return self.grid.building_count
 
     def _analyze_situation(self) -> Optional[Message]:
         """Analyze current grid state and provide strategic assessment."""
-        # Count empty spaces and existing structures
-        empty_spaces = 0
-        structures = 0
-        for x in range(self.grid.width):
-            for y in range(self.grid.height):
-                if self.grid.is_empty(x, y):
-                    empty_spaces += 1
-                cell = self.grid.grid.get((x, y))
-                if cell and cell.structure:
-                    structures += 1
-        
-        scout_reports_count = len([msg for msg in self.scout_reports if "SCOUT_REPORT" in msg])
+        # Empty spaces come from the grid's empty-cell index, structures from its building count
+        empty_spaces = len(self.grid.empty_cells())
+        structures = self._count_buildings()
+        
+        scout_reports_count = self.scout_reports_received
         builder_pos = self.grid.get_agent_position("builder")
         
         analysis = f"STRATEGIC_ANALYSIS: {empty_spaces} empty spaces, {structures}/{self.BUILD_TARGET} buildings built, {scout_reports_count} scout reports, builder at {builder_pos}"
         self.status = "Analyzing battlefield"
-        logger.info(f"Strategist analysis: {analysis}")
+        logger.info("Strategist analysis: %s", analysis)
         return self.send_message(analysis)
 
     def _coordinate_agents(self, message: str) -> Optional[Message]:
         """Send coordination message to other agents."""
         self.status = "Coordinating team"
         coord_msg = f"COORDINATION: {message}"
-        logger.info(f"Strategist coordination: {coord_msg}")
+        logger.info("Strategist coordination: %s", coord_msg)
         return self.send_message(coord_msg)
 
-    def _calculate_location_value(self, x: int, y: int, scout_positions: list[tuple[int, int]], builder_pos: Optional[tuple[int, int]]) -> float:
+    def _calculate_location_value(self, x: int, y: int, scout_positions: list[tuple[int, int]], builder_pos: Optional[tuple[int, int]],
+                                  structure_positions: set[tuple[int, int]]) -> float:
         """Calculate strategic value of a location."""
         value = 0.0
         
@@ -310,21 +328,15 @@ class StrategistAgent(BaseAgent):
             value += max(0, 5 - min_distance_to_scout)
         
         # Prefer locations near the center (but lower priority)
-        center_x = (self.grid.width - 1) // 2
-        center_y = (self.grid.height - 1) // 2
+        center_x, center_y = self._center
         distance_from_center = abs(x - center_x) + abs(y - center_y)
-        max_distance = max(self.grid.width, self.grid.height)
-        value += (max_distance - distance_from_center) * 0.3
-        
-        # Avoid locations too close to existing structures
-        min_distance_to_structure = float('inf')
-        for (sx, sy), cell in self.grid.grid.items():
-            if cell.structure:
-                distance = abs(x - sx) + abs(y - sy)
-                min_distance_to_structure = min(min_distance_to_structure, distance)
+        value += (self._max_distance - distance_from_center) * 0.3
         
-        if min_distance_to_structure != float('inf') and min_distance_to_structure > 0:
-            value += min(min_distance_to_structure, 2)
+        # Avoid locations too close to existing structures. The bonus is the Manhattan distance
+        # to the nearest structure capped at 2, so only distances 0 and 1 need an exact answer
+        if structure_positions and (x, y) not in structure_positions:
+            adjacent = any(pos in structure_positions for pos in self.grid.adjacent_positions((x, y)))
+            value += 1 if adjacent else 2
         
         # Small penalty for edge locations
         if x == 0 or x == self.grid.width - 1 or y == 0 or y == self.grid.height - 1:
@@ -336,7 +348,7 @@ class StrategistAgent(BaseAgent):
         """Get strategist status with analysis metrics."""
         base_status = super().get_status()
         base_status.update({
-            "scout_reports_received": len(self.scout_reports),
+            "scout_reports_received": self.scout_reports_received,
             "build_orders_issued": len(self.suggested_locations),
             "analysis_cycles": self.analysis_count,
             "building_target": self.BUILD_TARGET,
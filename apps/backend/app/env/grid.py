@@ -156,15 +156,26 @@ class Grid:
         self.agent_positions: Dict[str, GridLocation] = {}  # agent_id -> (x, y)
         self.directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # left, right, up, down
         self.collision_system = CollisionAvoidanceSystem()
+        # Bumped on every agent or structure change so callers can cache derived views
+        self.version = 0
+        # Bumped only when a structure is placed, for views that ignore agent movement
+        self.structures_version = 0
+        # Buildings placed so far; structures are never removed, so this only grows
+        self.building_count = 0
         
         # Initialize cells with terrain
         self._initialize_terrain(terrain_seed)
+        self._adjacent = self._build_adjacency()
+        # Passable cells with no agent, kept in step with agent placement and movement
+        self._empty_cells: Set[GridLocation] = {
+            pos for pos, cell in self.grid.items() if cell.terrain.can_move_through()
+        }
         
         # Performance tracking
         self.movement_history: List[Dict] = []
         self.resource_extraction_log: List[Dict] = []
         
-        logger.info(f"Enhanced Grid initialized: {width}x{height} = {len(self.grid)} cells")
+        logger.info("Enhanced Grid initialized: %sx%s = %s cells", width, height, len(self.grid))
 
     def _initialize_terrain(self, seed: int = None):
         """Initialize grid with varied terrain"""
@@ -208,6 +219,49 @@ class Grid:
                 
                 self.grid[(x, y)] = cell
 
+    def _build_adjacency(self) -> Dict[GridLocation, Tuple[GridLocation, ...]]:
+        """Precompute each cell's in-bounds neighbors, in `directions` order"""
+        adjacency = {}
+        for x in range(self.width):
+            for y in range(self.height):
+                adjacency[(x, y)] = tuple(
+                    (x + dx, y + dy) for dx, dy in self.directions
+                    if 0 <= x + dx < self.width and 0 <= y + dy < self.height
+                )
+        return adjacency
+
+    def adjacent_positions(self, position: GridLocation) -> Tuple[GridLocation, ...]:
+        """Get the in-bounds orthogonal neighbors of a position"""
+        return self._adjacent.get(position, ())
+
+    def empty_neighbors(self, position: GridLocation) -> List[GridLocation]:
+        """Get adjacent positions with passable terrain and no agent or structure"""
+        empty = []
+        for neighbor in self.adjacent_positions(position):
+            cell = self.grid[neighbor]
+            if cell.occupied_by is None and not cell.structure and cell.terrain.can_move_through():
+                empty.append(neighbor)
+        return empty
+
+    def find_adjacent_buildable(self, position: GridLocation) -> List[GridLocation]:
+        """Get adjacent empty positions whose terrain can also be built on"""
+        return [
+            neighbor for neighbor in self.empty_neighbors(position)
+            if self.grid[neighbor].terrain.can_build_on()
+        ]
+
+    def empty_cells(self) -> List[GridLocation]:
+        """Get every passable cell with no agent, in no particular order"""
+        # Terrain can be edited in place, so confirm each indexed cell before handing it out
+        return [position for position in self._empty_cells if self.is_empty(*position)]
+
+    def find_any_empty_cell(self) -> Optional[GridLocation]:
+        """Get some passable cell with no agent, or None if there is none"""
+        for position in self._empty_cells:
+            if self.is_empty(*position):
+                return position
+        return None
+
     def place_agent(self, agent_id: str, position: GridLocation) -> bool:
         """Place an agent at a specific position"""
         if position not in self.grid:
@@ -220,8 +274,10 @@ class Grid:
         cell.occupied_by = agent_id
         cell.visit(agent_id)
         self.agent_positions[agent_id] = position
+        self._empty_cells.discard(position)
+        self.version += 1
         
-        logger.info(f"Agent {agent_id} placed at {position}")
+        logger.info("Agent %s placed at %s", agent_id, position)
         return True
 
     def get_agent_position(self, agent_id: str) -> Optional[GridLocation]:
@@ -235,11 +291,11 @@ class Grid:
     def move_agent(self, agent_id: str, new_position: GridLocation) -> bool:
         """Move an agent to a new position"""
         if agent_id not in self.agent_positions:
-            logger.warning(f"Cannot move agent {agent_id}: not found in agent_positions")
+            logger.warning("Cannot move agent %s: not found in agent_positions", agent_id)
             return False
             
         if new_position not in self.grid:
-            logger.warning(f"Cannot move agent {agent_id} to {new_position}: position invalid")
+            logger.warning("Cannot move agent %s to %s: position invalid", agent_id, new_position)
             return False
         
         old_position = self.agent_positions[agent_id]
@@ -248,12 +304,12 @@ class Grid:
         
         # Check if target cell is occupied by another agent
         if new_cell.occupied_by and new_cell.occupied_by != agent_id:
-            logger.warning(f"Movement blocked: {new_position} occupied by {new_cell.occupied_by}")
+            logger.warning("Movement blocked: %s occupied by %s", new_position, new_cell.occupied_by)
             return False
         
         # Check if target cell allows movement
         if not new_cell.terrain.can_move_through():
-            logger.warning(f"Movement blocked: {new_position} terrain impassable")
+            logger.warning("Movement blocked: %s terrain impassable", new_position)
             return False
         
         # Execute movement
@@ -261,6 +317,10 @@ class Grid:
         new_cell.occupied_by = agent_id
         new_cell.visit(agent_id)
         self.agent_positions[agent_id] = new_position
+        if old_position != new_position:
+            self._empty_cells.add(old_position)
+            self._empty_cells.discard(new_position)
+        self.version += 1
         
         # Record movement in history
         self.movement_history.append({
@@ -270,22 +330,22 @@ class Grid:
             "timestamp": time.time()
         })
         
-        logger.debug(f"Agent {agent_id} moved from {old_position} to {new_position}")
+        logger.debug("Agent %s moved from %s to %s", agent_id, old_position, new_position)
         return True
 
     def request_movement(self, agent_id: str, new_position: GridLocation, priority: float = 1.0) -> bool:
         """Request movement with collision avoidance"""
         if agent_id not in self.agent_positions:
-            logger.warning(f"Cannot move agent {agent_id}: not found in agent_positions")
+            logger.warning("Cannot move agent %s: not found in agent_positions", agent_id)
             return False
             
         if new_position not in self.grid:
-            logger.warning(f"Cannot move agent {agent_id} to {new_position}: position invalid")
+            logger.warning("Cannot move agent %s to %s: position invalid", agent_id, new_position)
             return False
         
         target_cell = self.grid[new_position]
         if not target_cell.terrain.can_move_through():
-            logger.warning(f"Cannot move agent {agent_id} to {new_position}: terrain impassable")
+            logger.warning("Cannot move agent %s to %s: terrain impassable", agent_id, new_position)
             return False
         
         # Add to collision avoidance system
@@ -308,6 +368,10 @@ class Grid:
         """Check if coordinates are within grid bounds"""
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def get_cell(self, x: int, y: int) -> Optional[Cell]:
+        """Get the cell at the given coordinates, or None outside the grid"""
+        return self.grid.get((x, y))
+
     def is_empty(self, x: int, y: int) -> bool:
         """Check if a cell is empty (no agent, passable terrain)"""
         if not self.is_within_bounds(x, y):
@@ -323,7 +387,7 @@ class Grid:
     def place(self, x: int, y: int, structure) -> bool:
         """Place a structure at the given coordinates"""
         if not self.is_within_bounds(x, y):
-            logger.warning(f"Cannot place structure at ({x}, {y}): out of bounds")
+            logger.warning("Cannot place structure at (%s, %s): out of bounds", x, y)
             return False
         
         cell = self.grid.get((x, y))
@@ -331,13 +395,14 @@ class Grid:
             # Create cell if it doesn't exist
             cell = Cell(x, y)
             self.grid[(x, y)] = cell
+            self._empty_cells.add((x, y))
         
         if cell.structure:
-            logger.warning(f"Cannot place structure at ({x}, {y}): already has structure")
+            logger.warning("Cannot place structure at (%s, %s): already has structure", x, y)
             return False
         
         if not cell.terrain.can_build_on():
-            logger.warning(f"Cannot place structure at ({x}, {y}): terrain not suitable")
+            logger.warning("Cannot place structure at (%s, %s): terrain not suitable", x, y)
             return False
         
         # Set the structure (assuming it has a built_by attribute)
@@ -345,8 +410,11 @@ class Grid:
             cell.structure = structure
         else:
             cell.structure = "building"  # Generic structure type
+        self.building_count += 1
+        self.version += 1
+        self.structures_version += 1
         
-        logger.info(f"Structure placed at ({x}, {y})")
+        logger.info("Structure placed at (%s, %s)", x, y)
         return True
 
     def harvest_resources(self, position: GridLocation, resource_type: ResourceType, 
@@ -366,7 +434,7 @@ class Grid:
                 "amount": harvested,
                 "timestamp": time.time()
             })
-            logger.debug(f"Agent {agent_id} harvested {harvested} {resource_type.value} at {position}")
+            logger.debug("Agent %s harvested %s %s at %s", agent_id, harvested, resource_type.value, position)
         
         return harvested
 
@@ -388,12 +456,7 @@ class Grid:
             if current == goal:
                 return self._reconstruct_path(came_from, current)
             
-            for dx, dy in self.directions:
-                neighbor = (current[0] + dx, current[1] + dy)
-                
-                if not self.is_within_bounds(neighbor[0], neighbor[1]):
-                    continue
-                
+            for neighbor in self.adjacent_positions(current):
                 cell = self.grid.get(neighbor)
                 if not cell or not cell.terrain.can_move_through():
                     continue
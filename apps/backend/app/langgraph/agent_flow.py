@@ -88,7 +88,7 @@ def initialization_phase(state: AgentState) -> AgentState:
         state["mission_phase"] = "completion"
         return state
 
-def exploration_phase(state: AgentState) -> AgentState:
+async def exploration_phase(state: AgentState) -> AgentState:
     """Execute ONE exploration step"""
     logger.info("Executing exploration phase")
     
@@ -96,7 +96,7 @@ def exploration_phase(state: AgentState) -> AgentState:
         # Execute scout step and capture the message
         if scout_agent and coordination_manager:
             scout_messages = coordination_manager.get_messages_for_agent("scout")
-            result_message = scout_agent.step(scout_messages)
+            result_message = await scout_agent.step(scout_messages)
             
             if result_message:
                 # Add the message to our state messages
@@ -122,14 +122,14 @@ def exploration_phase(state: AgentState) -> AgentState:
         state["mission_phase"] = "analysis"  # Move forward on error
         return state
 
-def analysis_phase(state: AgentState) -> AgentState:
+async def analysis_phase(state: AgentState) -> AgentState:
     """Execute ONE analysis step"""
     logger.info("Executing analysis phase")
     
     try:
         if strategist_agent and coordination_manager:
             strategist_messages = coordination_manager.get_messages_for_agent("strategist")
-            result_message = strategist_agent.step(strategist_messages)
+            result_message = await strategist_agent.step(strategist_messages)
             
             if result_message:
                 # Add the message to our state messages
@@ -195,14 +195,14 @@ def analysis_phase(state: AgentState) -> AgentState:
 #         logger.error(f"Construction phase error: {e}")
 #         return state
 
-def construction_phase(state: AgentState) -> AgentState:
+async def construction_phase(state: AgentState) -> AgentState:
     """Execute ONE construction step"""
     logger.info("Executing construction phase")
     
     try:
         if builder_agent and coordination_manager:
             builder_messages = coordination_manager.get_messages_for_agent("builder")
-            result_message = builder_agent.step(builder_messages)
+            result_message = await builder_agent.step(builder_messages)
             
             if result_message:
                 state["messages"].append(result_message)
@@ -11,6 +11,7 @@ load_dotenv()
 
 # Now import your modules after env vars are loaded
 from app.simulation import Simulation
+from app.agents.base import MemoryType
 
 # Configure logging
 logging.basicConfig(
@@ -27,6 +28,10 @@ if not openai_key:
 else:
     logger.info(f"OpenAI API key loaded: {openai_key[:10]}...")
 
+# Grid size for new simulations, read once at startup
+GRID_WIDTH = int(os.getenv("GRID_WIDTH", 6))
+GRID_HEIGHT = int(os.getenv("GRID_HEIGHT", 5))
+
 # Global simulation instance
 sim = None
 
@@ -39,11 +44,8 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Starting up FastAPI application...")
     try:
         # Initialize simulation with error handling
-        grid_width = int(os.getenv("GRID_WIDTH", 6))
-        grid_height = int(os.getenv("GRID_HEIGHT", 5))
-        
-        logger.info(f"Initializing simulation with grid size {grid_width}x{grid_height}")
-        sim = Simulation(width=grid_width, height=grid_height)
+        logger.info(f"Initializing simulation with grid size {GRID_WIDTH}x{GRID_HEIGHT}")
+        sim = Simulation(width=GRID_WIDTH, height=GRID_HEIGHT)
         logger.info("Enhanced simulation initialized successfully")
         
     except Exception as e:
@@ -120,8 +122,8 @@ def ensure_simulation():
         logger.warning("⚠️ Simulation not initialized, creating new instance...")
         try:
             sim = Simulation(
-                width=int(os.getenv("GRID_WIDTH", 6)),
-                height=int(os.getenv("GRID_HEIGHT", 5))
+                width=GRID_WIDTH,
+                height=GRID_HEIGHT
             )
             logger.info("Emergency simulation initialization successful")
         except Exception as e:
@@ -163,7 +165,7 @@ async def health_check():
                 "status": "degraded",
                 "simulation": simulation_status,
                 "error": "Simulation not initialized",
-                "openai_configured": bool(os.getenv("OPENAI_API_KEY")),
+                "openai_configured": bool(openai_key),
                 "can_initialize": True
             }
             
@@ -180,7 +182,7 @@ async def health_check():
             "mission_phase": conditional_metrics["mission_phase"],
             "coordination_active": conditional_metrics["coordination_needed"],
             "emergency_mode": conditional_metrics.get("active_threats", 0) > 0,
-            "openai_configured": bool(os.getenv("OPENAI_API_KEY")),
+            "openai_configured": bool(openai_key),
             "conditional_flows": "enabled"
         }
     except Exception as e:
@@ -189,7 +191,7 @@ async def health_check():
             "status": "unhealthy",
             "simulation": "error",
             "error": str(e),
-            "openai_configured": bool(os.getenv("OPENAI_API_KEY"))
+            "openai_configured": bool(openai_key)
         }
 
 @app.get("/api/grid")
@@ -230,7 +232,7 @@ async def step_simulation():
     """Execute one simulation step with conditional flow processing."""
     try:
         current_sim = ensure_simulation()
-        result = current_sim.step()
+        result = await current_sim.step()
         logger.info(f"Enhanced simulation step completed. Step: {result.get('step_count')}, "
                    f"Phase: {result.get('mission_phase')}, "
                    f"Coordination: {result.get('coordination_needed')}")
@@ -357,8 +359,8 @@ async def reset_simulation():
     try:
         global sim
         sim = Simulation(
-            width=int(os.getenv("GRID_WIDTH", 6)),
-            height=int(os.getenv("GRID_HEIGHT", 5))
+            width=GRID_WIDTH,
+            height=GRID_HEIGHT
         )
         logger.info("Enhanced simulation reset successfully")
         return {"message": "Enhanced simulation reset successfully"}
@@ -374,7 +376,7 @@ async def debug_info():
             return {
                 "error": "Simulation not initialized",
                 "can_initialize": True,
-                "openai_configured": bool(os.getenv("OPENAI_API_KEY"))
+                "openai_configured": bool(openai_key)
             }
         
         # Get detailed agent information
@@ -382,8 +384,8 @@ async def debug_info():
         for agent_id, agent in sim.agents.items():
             agents_debug[agent_id] = {
                 "basic_status": agent.get_status(),
-                "memory_full": agent.memory,
-                "memory_count": len(agent.memory),
+                "memory_full": [m.content for m in agent.memory_system.get_recent(MemoryType.SHORT_TERM)],
+                "memory_count": len(agent.memory_system.memories[MemoryType.SHORT_TERM]),
                 "position": sim.grid.get_agent_position(agent_id),
                 "agent_class": type(agent).__name__,
                 "last_activity": sim.state["last_activity"].get(agent_id, "none"),
@@ -402,7 +404,7 @@ async def debug_info():
             if hasattr(agent, 'suggested_locations'):
                 agents_debug[agent_id]["build_orders_issued"] = len(agent.suggested_locations)
                 agents_debug[agent_id]["suggested_locations"] = list(agent.suggested_locations)
-                agents_debug[agent_id]["scout_reports"] = len(getattr(agent, 'scout_reports', []))
+                agents_debug[agent_id]["scout_reports"] = getattr(agent, 'scout_reports_received', 0)
         
         # Enhanced grid debug info
         grid_debug = {
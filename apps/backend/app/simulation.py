@@ -143,7 +143,7 @@ class Simulation:
         
         logger.info(f"Enhanced conditional simulation initialized with {len(self.agents)} agents on {width}x{height} grid")
 
-    def step(self) -> dict:
+    async def step(self) -> dict:
         """Execute one simulation step with enhanced conditional logic."""
         try:
             self.state["step_count"] += 1
@@ -194,7 +194,7 @@ class Simulation:
             previous_phase = self.state["mission_phase"]
             
             # Run the enhanced conditional flow - it will execute the current phase
-            result_state = self.flow.invoke(flow_state)
+            result_state = await self.flow.ainvoke(flow_state)
 
             # Update our state with the results
             self.state["messages"] = result_state["messages"]
@@ -343,8 +343,8 @@ class Simulation:
                     # Update scout's visited cells too
                     scout.visited_cells.add(position)
         
-        logger.debug(f"Synced exploration: Scout has {len(scout.visited_cells) if scout else 0} cells, "
-                    f"Simulation tracks {len(self.visited_cells)} cells")
+        logger.debug("Synced exploration: Scout has %d cells, Simulation tracks %d cells",
+                     len(scout.visited_cells) if scout else 0, len(self.visited_cells))
 
     def _get_fresh_agent_status(self) -> dict:
         """Get fresh agent status with enhanced conditional information."""
@@ -375,8 +375,8 @@ class Simulation:
                 elif agent_id == "strategist":
                     agent_status["mission_role"] = "Tactical Coordinator & Planner"
                     # Force refresh strategist data
-                    if hasattr(agent, 'scout_reports'):
-                        agent_status["scout_reports_received"] = len(agent.scout_reports)
+                    if hasattr(agent, 'scout_reports_received'):
+                        agent_status["scout_reports_received"] = agent.scout_reports_received
                     if hasattr(agent, 'suggested_locations'):
                         agent_status["build_orders_issued"] = len(agent.suggested_locations)
                     if hasattr(agent, 'analysis_count'):
@@ -402,8 +402,8 @@ class Simulation:
                     agent_status["construction_target"] = SimulationGoals.BUILDING_TARGET
                 
                 status[agent_id] = agent_status
-                logger.debug(f"Enhanced agent {agent_id} status: phase={self.state['mission_phase']}, "
-                           f"activity={self.state['last_activity'].get(agent_id, 'none')}")
+                logger.debug("Enhanced agent %s status: phase=%s, activity=%s", agent_id,
+                             self.state['mission_phase'], self.state['last_activity'].get(agent_id, 'none'))
             
             return status
         except Exception as e:
@@ -415,17 +415,13 @@ class Simulation:
         total_cells = self.grid.width * self.grid.height
         explored_cells = len(self.visited_cells)
         progress = min(explored_cells / total_cells, 1.0)
-        logger.debug(f"Exploration progress: {explored_cells}/{total_cells} = {progress:.2%}")
+        logger.debug("Exploration progress: %d/%d = %.2f%%", explored_cells, total_cells, progress * 100)
         return progress
 
     def _count_buildings(self) -> int:
         """Count the number of buildings constructed."""
-        building_count = 0
-        for cell in self.grid.grid.values():
-            if cell.structure and cell.structure != "scanned":
-                building_count += 1
-        logger.debug(f"Buildings count: {building_count}")
-        return building_count
+        # Shares the grid's running count with the strategist, so the two can't disagree
+        return self.grid.building_count
 
     def get_grid_state(self) -> dict:
         """Get current grid state with enhanced progress metrics."""
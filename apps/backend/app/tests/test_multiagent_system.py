@@ -4,14 +4,16 @@ import unittest
 import asyncio
 import time
 import threading
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from typing import List, Dict, Any
 import tempfile
 import os
 
 # Import the modules we're testing
-from app.env.grid import Grid, TerrainType, ResourceType
-from app.agents.base import BaseAgent, MemoryType
+from app.env.grid import Grid, TerrainType, TerrainInfo, ResourceType
+from app.agents.base import BaseAgent, MemoryType, MemoryKind, MemorySystem, PlanningSystem, NearDuplicateCache
+from app.agents.batch_dispatcher import BatchLLMDispatcher
+from openai import AsyncStream
 from app.agents.scout import ScoutAgent
 from app.agents.builder import BuilderAgent
 from app.agents.strategist import StrategistAgent
@@ -32,6 +34,57 @@ class TestGrid(unittest.TestCase):
         self.assertEqual(self.grid.height, 5)
         self.assertEqual(len(self.grid.grid), 25)
     
+    def test_adjacent_positions(self):
+        """Test precomputed neighbors stay in bounds and keep direction order"""
+        self.assertEqual(self.grid.adjacent_positions((2, 2)), ((1, 2), (3, 2), (2, 1), (2, 3)))
+        self.assertEqual(self.grid.adjacent_positions((0, 0)), ((1, 0), (0, 1)))
+        self.assertEqual(self.grid.adjacent_positions((9, 9)), ())
+    
+    def test_empty_neighbors(self):
+        """Test empty neighbors exclude agents, structures and obstacles"""
+        grid = Grid(3, 3)
+        for cell in grid.grid.values():
+            cell.terrain = TerrainInfo(TerrainType.PLAIN)
+        grid.grid[(1, 0)].terrain = TerrainInfo(TerrainType.OBSTACLE, movement_cost=float('inf'))
+        grid.place_agent("other", (0, 1))
+        grid.place(1, 2, "building")
+        
+        self.assertEqual(grid.empty_neighbors((1, 1)), [(2, 1)])
+        
+        grid.grid[(2, 1)].terrain = TerrainInfo(TerrainType.WATER)
+        self.assertEqual(grid.empty_neighbors((1, 1)), [(2, 1)])
+        self.assertEqual(grid.find_adjacent_buildable((1, 1)), [])
+    
+    def test_find_any_empty_cell(self):
+        """Test the empty-cell index follows agent placement and movement"""
+        grid = Grid(3, 3, terrain_seed=42)
+        open_cells = grid.empty_cells()
+        self.assertEqual(sorted(open_cells), sorted(pos for pos in grid.grid if grid.is_empty(*pos)))
+        self.assertGreater(len(open_cells), 1)
+        
+        *filled, last = open_cells
+        for i, position in enumerate(filled):
+            self.assertTrue(grid.place_agent(f"agent_{i}", position))
+        self.assertEqual(grid.find_any_empty_cell(), last)
+        self.assertEqual(grid.empty_cells(), [last])
+        
+        grid.move_agent("agent_0", last)
+        self.assertEqual(grid.find_any_empty_cell(), filled[0])
+        grid.place_agent("late", filled[0])
+        self.assertIsNone(grid.find_any_empty_cell())
+        self.assertEqual(grid.empty_cells(), [])
+    
+    def test_building_count(self):
+        """Test the building count follows successful structure placement only"""
+        grid = Grid(2, 1)
+        for cell in grid.grid.values():
+            cell.terrain = TerrainInfo(TerrainType.PLAIN)
+        
+        self.assertTrue(grid.place(0, 0, "building"))
+        self.assertFalse(grid.place(0, 0, "building"))
+        self.assertFalse(grid.place(5, 5, "building"))
+        self.assertEqual(grid.building_count, 1)
+    
     def test_agent_placement(self):
         """Test agent placement and position tracking"""
         success = self.grid.place_agent("test_agent", (0, 0))
@@ -134,6 +187,371 @@ class TestAgentMemorySystem(unittest.TestCase):
         self.assertIsInstance(next_step, dict)
         self.assertIn("action", next_step)
 
+class TestMemoryIndex(unittest.TestCase):
+    """Test the memory system's keyword index"""
+    
+    def setUp(self):
+        self.memory = MemorySystem(max_entries=40)
+    
+    def test_retrieval_matches_whole_words(self):
+        """Test retrieval goes through the token index"""
+        self.memory.store("Moved north to (1, 2)", MemoryType.SHORT_TERM)
+        self.memory.store("Built structure at (3, 3)", MemoryType.SHORT_TERM)
+        
+        memories = self.memory.retrieve("BUILT something", MemoryType.SHORT_TERM)
+        self.assertEqual([m.content for m in memories], ["Built structure at (3, 3)"])
+        self.assertEqual(memories[0].retrieval_count, 1)
+        self.assertEqual(self.memory.retrieve("nothing relevant"), [])
+    
+    def test_rare_terms_rank_higher(self):
+        """Test lexical relevance breaks ties between equally important memories"""
+        for i in range(5):
+            self.memory.store(f"Explored cell {i}", MemoryType.SHORT_TERM, importance=0.5)
+        self.memory.store("Explored cell with water source", MemoryType.SHORT_TERM, importance=0.5)
+        
+        memories = self.memory.retrieve("explored water", MemoryType.SHORT_TERM, limit=2)
+        self.assertEqual(memories[0].content, "Explored cell with water source")
+    
+    def test_index_survives_pruning(self):
+        """Test postings are rebuilt when memories are pruned"""
+        for i in range(15):
+            self.memory.store(f"Filler entry {i}", MemoryType.EPISODIC, importance=0.1)
+        self.memory.store("Important discovery", MemoryType.EPISODIC, importance=0.9)
+        
+        memories = self.memory.retrieve("discovery", MemoryType.EPISODIC)
+        self.assertEqual(len(memories), 1)
+        self.assertEqual(memories[0].content, "Important discovery")
+        self.assertLessEqual(len(self.memory.memories[MemoryType.EPISODIC]), 10)
+    
+    def test_retrieval_excludes_kinds(self):
+        """Test excluded memory kinds are neither returned nor counted as accessed"""
+        self.memory.store("Observed from (1, 1): 4 nearby cells", MemoryType.SHORT_TERM, kind=MemoryKind.OBSERVATION)
+        self.memory.store("Sent message: clear at (1, 1)", MemoryType.SHORT_TERM, kind=MemoryKind.MESSAGE)
+        
+        memories = self.memory.retrieve("(1, 1)", exclude_kinds={MemoryKind.OBSERVATION})
+        self.assertEqual([m.kind for m in memories], [MemoryKind.MESSAGE])
+        observation = next(iter(self.memory.memories[MemoryType.SHORT_TERM].values()))
+        self.assertEqual(observation.retrieval_count, 0)
+
+class TestPlanningSystem(unittest.TestCase):
+    """Test plan execution bookkeeping"""
+    
+    def test_step_status_updates(self):
+        """Test executed steps can be marked complete"""
+        planner = PlanningSystem("planner")
+        plan = planner.create_plan("build a house", {})
+        
+        step = planner.execute_next_step()
+        self.assertEqual(step, plan[0])
+        self.assertEqual(len(planner.current_plan), len(plan) - 1)
+        
+        planner.update_step_status(step, "completed", result="ok")
+        self.assertEqual(planner.execution_log[-1]["status"], "completed")
+        self.assertEqual(planner.execution_log[-1]["result"], "ok")
+
+class TestAgentObservation(unittest.TestCase):
+    """Test agent observation caching"""
+    
+    def setUp(self):
+        self.grid = Grid(3, 3, terrain_seed=42)
+        self.agent = ScoutAgent("observer", self.grid)
+        self.grid.place_agent("observer", (1, 1))
+    
+    def test_observation_reused_until_grid_changes(self):
+        """Test unchanged surroundings are not rebuilt but every observation is still remembered"""
+        first = self.agent.observe()
+        observed = len(self.agent.memory_system.memories[MemoryType.SHORT_TERM])
+        
+        second = self.agent.observe()
+        self.assertIs(second["surroundings"], first["surroundings"])
+        self.assertEqual(len(self.agent.memory_system.memories[MemoryType.SHORT_TERM]), observed + 1)
+        
+        self.assertTrue(any(self.grid.place(x, y, "building") for x, y in [(0, 1), (2, 1), (1, 0), (1, 2)]))
+        third = self.agent.observe()
+        self.assertIsNot(third["surroundings"], first["surroundings"])
+
+class TestScoutAgent(unittest.TestCase):
+    """Test scout planning, exploration and status"""
+    
+    def setUp(self):
+        self.grid = Grid(3, 3, terrain_seed=3)  # every cell passable
+        self.scout = ScoutAgent("explorer", self.grid)
+        self.grid.place_agent("explorer", (1, 1))
+    
+    def test_scout_plans_concurrently_and_applies_in_order(self):
+        """Test scout LLM calls can overlap while their actions are applied one at a time"""
+        other = ScoutAgent("other", self.grid)
+        self.grid.place_agent("other", next(iter(self.grid.empty_cells())))
+        self.scout.get_llm_decision = AsyncMock(return_value="OBSERVE")
+        other.get_llm_decision = AsyncMock(side_effect=RuntimeError("API down"))
+        
+        async def run():
+            return await asyncio.gather(self.scout.plan([]), other.plan([]))
+        
+        actions = asyncio.run(run())
+        self.assertEqual(actions, ["OBSERVE", None])
+        self.assertIn("SCOUT_REPORT: At (1, 1)", self.scout.apply(actions[0]).content)
+        self.assertIsNotNone(other.apply(actions[1]))
+
+    def test_systematic_exploration_prefers_unvisited_cells_in_priority_order(self):
+        """Test the fallback move goes east, south, west, north, skipping visited and blocked cells"""
+        self.grid.place_agent("blocker", (1, 2))
+        self.scout.visited_cells.add((2, 1))
+        
+        self.assertIn("Moved west to (0, 1)", self.scout._systematic_exploration().content)
+        self.scout.visited_cells.update({(0, 0), (0, 2), (1, 1)})
+        self.assertIn("Moved east to (1, 1)", self.scout._systematic_exploration().content)
+
+    def test_actions_split_on_any_whitespace(self):
+        """Test an action keyword separated by a tab or newline still dispatches"""
+        self.assertIn("Moved north to (1, 0)", self.scout.apply("MOVE\tnorth").content)
+        self.assertIn("Moved south to (1, 1)", self.scout.apply("MOVE\nsouth").content)
+        self.assertIn("SCOUT_REPORT: all clear", self.scout.apply("REPORT\tall   clear").content)
+
+    def test_status_lists_recently_visited_cells(self):
+        """Test the default scout status carries the latest visited cells in visit order"""
+        self.scout.visited_cells.add((1, 1))
+        for direction in ["east", "south", "west"]:
+            self.scout._move(direction)
+        
+        self.assertEqual(self.scout.get_status()["visited_cells_list"][-3:], [(2, 1), (2, 2), (1, 2)])
+        self.assertEqual(self.scout.get_status(debug=True)["visited_cells_list"], [(1, 1), (1, 2), (2, 1), (2, 2)])
+
+class TestStrategistAgent(unittest.TestCase):
+    """Test strategist build-site selection"""
+    
+    def setUp(self):
+        self.grid = Grid(3, 3, terrain_seed=42)
+        self.strategist = StrategistAgent("strategist", self.grid)
+    
+    def test_location_values_reused_until_structures_change(self):
+        """Test strategist candidate scores are cached until a structure is placed"""
+        with patch.object(self.strategist, '_calculate_location_value', wraps=self.strategist._calculate_location_value) as score:
+            first = self.strategist._find_optimal_building_locations((1, 1))
+            scored = score.call_count
+            self.assertGreater(scored, 0)
+            
+            self.assertEqual(self.strategist._find_optimal_building_locations((1, 1)), first)
+            self.assertEqual(score.call_count, scored)
+            
+            self.assertTrue(any(self.grid.place(x, y, "building") for x, y in [(0, 0), (2, 2), (0, 2), (2, 0)]))
+            self.strategist._find_optimal_building_locations((1, 1))
+            self.assertGreater(score.call_count, scored)
+
+class TestBuilderAgent(unittest.TestCase):
+    """Test builder order handling"""
+    
+    def setUp(self):
+        self.grid = Grid(3, 3, terrain_seed=3)  # every cell passable
+        self.builder = BuilderAgent("builder", self.grid)
+        self.grid.place_agent("builder", (0, 1))
+    
+    def test_build_order_coordinates_follow_build_at(self):
+        """Test a parenthetical ahead of the build site is not parsed as coordinates"""
+        order = "STRATEGIC_BUILD_ORDER (priority 1): Build at (2, 0) - high strategic value location"
+        self.assertEqual(self.builder._extract_coordinates_from_message(order), (2, 0))
+        self.assertEqual(self.builder._extract_coordinates_from_message("Relay: (0, 1) then (1, 2)"), (0, 1))
+        self.assertIsNone(self.builder._extract_coordinates_from_message("Build at (north, 2)"))
+
+    def test_reissued_build_order_is_retried_until_built(self):
+        """Test an identical order is acted on again after a failed attempt but skipped once built"""
+        order = Message("strategist", "STRATEGIC_BUILD_ORDER: Build at (1, 1) - high strategic value location")
+        outcomes = iter([False, True])
+        
+        with patch.object(self.builder, '_attempt_build', side_effect=lambda x, y: next(outcomes, False)):
+            self.assertIn("CONSTRUCTION_FAILED", asyncio.run(self.builder.step([order])).content)
+            self.assertEqual(len(self.builder.processed_messages), 0)
+            self.assertIn("CONSTRUCTION_COMPLETE", asyncio.run(self.builder.step([order])).content)
+            self.assertIn(("strategist", order.content), self.builder.processed_messages)
+            self.assertIn("standing by", asyncio.run(self.builder.step([order])).content)
+        self.assertEqual(self.builder.get_status()["processed_messages_count"], 1)
+
+class TestLLMDispatcher(unittest.TestCase):
+    """Test batching of concurrent LLM requests"""
+    
+    def _client(self, replies):
+        client = Mock()
+        responses = []
+        for reply in replies:
+            if isinstance(reply, Exception):
+                responses.append(reply)
+                continue
+            response = Mock()
+            response.choices = [Mock()]
+            response.choices[0].message.content = reply
+            responses.append(response)
+        client.chat.completions.create = AsyncMock(side_effect=responses)
+        return client
+    
+    def test_concurrent_requests_resolve_independently(self):
+        """Test each submitter gets its own result or error"""
+        dispatcher = BatchLLMDispatcher(max_concurrency=2)
+        client = self._client(["MOVE north", Exception("rate limited"), "WAIT"])
+        
+        async def run():
+            return await asyncio.gather(
+                *(dispatcher.submit(client, [{"role": "user", "content": str(i)}]) for i in range(3)),
+                return_exceptions=True
+            )
+        
+        results = asyncio.run(run())
+        self.assertEqual(results[0], "MOVE north")
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[2], "WAIT")
+        self.assertEqual(client.chat.completions.create.await_count, 3)
+        self.assertEqual(dispatcher._tasks, set())
+    
+    def test_dispatch_preserves_prompt_order(self):
+        """Test a batch of prompts returns texts in submission order"""
+        dispatcher = BatchLLMDispatcher(max_concurrency=2)
+        client = self._client(["MOVE north", "BUILD", "WAIT"])
+        prompts = [[{"role": "user", "content": str(i)}] for i in range(3)]
+        
+        self.assertEqual(asyncio.run(dispatcher.dispatch(client, prompts)), ["MOVE north", "BUILD", "WAIT"])
+    
+    def test_stream_stops_after_first_line(self):
+        """Test streamed completions are cut off once the action line is complete"""
+        chunks = []
+        for text in ["\n", "MOVE ", "north\nBecause", " the east is blocked"]:
+            chunk = Mock()
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = text
+            chunks.append(chunk)
+        stream = MagicMock(spec=AsyncStream)
+        stream.__aiter__.return_value = chunks
+        stream.close = AsyncMock()
+        client = Mock()
+        client.chat.completions.create = AsyncMock(return_value=stream)
+        dispatcher = BatchLLMDispatcher(stream=True)
+        
+        result = asyncio.run(dispatcher.submit(client, [{"role": "user", "content": "status"}]))
+        self.assertEqual(result, "MOVE north")
+        self.assertTrue(client.chat.completions.create.await_args.kwargs["stream"])
+        stream.close.assert_awaited_once()
+    
+    def test_stream_usage_logged_after_first_line(self):
+        """Test streamed calls request usage and log prompt-cache hits without delaying the action"""
+        chunks = []
+        for text in ["MOVE north\n", "Because the east is blocked"]:
+            chunk = Mock()
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = text
+            chunks.append(chunk)
+        usage_chunk = Mock(choices=[])
+        usage_chunk.usage.prompt_tokens = 1500
+        usage_chunk.usage.prompt_tokens_details.cached_tokens = 1024
+        chunks.append(usage_chunk)
+        stream = MagicMock(spec=AsyncStream)
+        stream.__aiter__.return_value = chunks
+        stream.close = AsyncMock()
+        client = Mock()
+        client.chat.completions.create = AsyncMock(return_value=stream)
+        dispatcher = BatchLLMDispatcher(stream=True)
+        
+        async def run():
+            result = await dispatcher.submit(client, [{"role": "user", "content": "status"}])
+            await asyncio.gather(*list(dispatcher._tasks))
+            return result
+        
+        with self.assertLogs('app.agents.batch_dispatcher', level='DEBUG') as logs:
+            self.assertEqual(asyncio.run(run()), "MOVE north")
+        self.assertEqual(client.chat.completions.create.await_args.kwargs["stream_options"], {"include_usage": True})
+        self.assertTrue(any("Prompt cache served 1024 of 1500" in line for line in logs.output))
+        stream.close.assert_awaited_once()
+    
+    def test_reusable_across_event_loops(self):
+        """Test the dispatcher keeps working when each call runs in a fresh loop"""
+        dispatcher = BatchLLMDispatcher(max_concurrency=1)
+        client = self._client(["MOVE north", "WAIT"])
+        messages = [{"role": "user", "content": "status"}]
+        
+        self.assertEqual(asyncio.run(dispatcher.submit(client, messages)), "MOVE north")
+        self.assertEqual(asyncio.run(dispatcher.submit(client, messages)), "WAIT")
+
+class TestLLMDecision(unittest.TestCase):
+    """Test LLM decision caching and prompt construction"""
+    
+    def setUp(self):
+        BaseAgent._response_cache.clear()
+        BaseAgent._similar_responses.clear()
+        self.grid = Grid(5, 5, terrain_seed=42)
+        with patch('openai.AsyncOpenAI'):
+            self.agent = ScoutAgent("cache_scout", self.grid)
+        self.assertTrue(any(self.grid.place_agent("cache_scout", (x, y)) for x in range(5) for y in range(5)))
+        response = Mock()
+        response.choices = [Mock()]
+        response.choices[0].message.content = "MOVE north"
+        self.agent.client = Mock()
+        self.agent.client.chat.completions.create = AsyncMock(return_value=response)
+    
+    def tearDown(self):
+        BaseAgent._response_cache.clear()
+        BaseAgent._similar_responses.clear()
+    
+    @patch('app.agents.base._LLM_CACHE', True)
+    def test_identical_prompt_served_from_cache(self):
+        """Test a repeated prompt does not call the API again"""
+        self.assertEqual(asyncio.run(self.agent.get_llm_decision([])), "MOVE north")
+        self.assertEqual(asyncio.run(self.agent.get_llm_decision([])), "MOVE north")
+        self.assertEqual(self.agent.client.chat.completions.create.await_count, 1)
+    
+    def test_concurrent_identical_prompts_share_request(self):
+        """Test identical prompts in flight together cost one API call, with the cache off"""
+        async def run():
+            return await asyncio.gather(*(self.agent.get_llm_decision([]) for _ in range(3)))
+        
+        self.assertEqual(asyncio.run(run()), ["MOVE north"] * 3)
+        self.assertEqual(self.agent.client.chat.completions.create.await_count, 1)
+        self.assertEqual(BaseAgent._inflight, {})
+        self.assertEqual(len(BaseAgent._response_cache), 0)
+    
+    def test_cache_off_by_default(self):
+        """Test repeated prompts reach the API unless caching is enabled"""
+        asyncio.run(self.agent.get_llm_decision([]))
+        asyncio.run(self.agent.get_llm_decision([]))
+        self.assertEqual(self.agent.client.chat.completions.create.await_count, 2)
+        self.assertEqual(len(BaseAgent._response_cache), 0)
+    
+    @patch('app.agents.base._LLM_CACHE', True)
+    def test_near_duplicate_prompt_reuses_decision(self):
+        """Test a prompt differing only in a progress figure is answered from the near-duplicate cache"""
+        reports = [f"SCOUT_REPORT: Moved east to ({i}, 2) - continuing exploration ({i * 4}.0% complete)" for i in range(5)]
+        messages = [Message("scout", report) for report in reports]
+        self.assertEqual(asyncio.run(self.agent.get_llm_decision(messages)), "MOVE north")
+        
+        messages[-1] = Message("scout", reports[-1].replace("16.0%", "16.5%"))
+        self.assertEqual(asyncio.run(self.agent.get_llm_decision(messages)), "MOVE north")
+        self.assertEqual(self.agent.client.chat.completions.create.await_count, 1)
+    
+    @patch('app.agents.base._PROMPT_TOKEN_BUDGET', 250)
+    def test_prompt_trimmed_to_token_budget(self):
+        """Test oldest messages are dropped until the prompt fits the budget"""
+        messages = [Message("strategist", f"report {i} " + "x" * 200) for i in range(5)]
+        asyncio.run(self.agent.get_llm_decision(messages))
+        
+        call = self.agent.client.chat.completions.create.await_args
+        user_prompt = call.kwargs["messages"][1]["content"]
+        self.assertLessEqual(len(user_prompt), 250 * 4)
+        self.assertIn("report 4", user_prompt)
+        self.assertNotIn("report 0", user_prompt)
+    
+    def test_near_duplicate_situations_share_decision(self):
+        """Test a slightly different situation reuses the decision, per role and position only"""
+        cache = NearDuplicateCache()
+        reports = [f"SCOUT_REPORT: Moved east to ({i}, 2) - continuing exploration ({i * 4}.0% complete)" for i in range(5)]
+        memories = ["LLM decision: MOVE east", "Moved east: (1,2) → (2,2)", "Observed from (2, 2): 3 nearby cells"]
+        here = ((3, 4), ((3, 5), None, None))
+        cache.add("scout", here, NearDuplicateCache.shingles(f"{{}} {reports} {memories} No active plan"), "MOVE north")
+        
+        reports[-1] = reports[-1].replace("16.0%", "16.5%")
+        similar = NearDuplicateCache.shingles(f"{{}} {reports} {memories} No active plan")
+        self.assertEqual(cache.lookup("scout", here, similar), "MOVE north")
+        self.assertIsNone(cache.lookup("builder", here, similar))
+        self.assertIsNone(cache.lookup("scout", ((3, 5), ((3, 4), None, None)), similar))
+        
+        reports[0] = "STRATEGIC_BUILD_ORDER: Build at (3, 3) - high strategic value location"
+        self.assertIsNone(cache.lookup("scout", here, NearDuplicateCache.shingles(f"{{}} {reports} {memories} No active plan")))
+
 class TestMessageQueueSystem(unittest.TestCase):
     """Test message queue and coordination systems"""
     
@@ -154,6 +572,20 @@ class TestMessageQueueSystem(unittest.TestCase):
         self.assertEqual(len(messages), 2)
         self.assertEqual(messages[0].priority, MessagePriority.HIGH)
     
+    def test_messages_for_agent_leave_others_queued(self):
+        """Test draining one agent's messages keeps other recipients' messages and drops expired ones"""
+        for_builder = Message("strategist", "Build", recipient="builder", priority=MessagePriority.LOW)
+        for_scout = Message("strategist", "Scan", recipient="scout")
+        urgent = Message("strategist", "Stop", recipient="builder", priority=MessagePriority.URGENT)
+        expired = Message("strategist", "Old", recipient="builder", timestamp=time.time() - 10, ttl=1)
+        for msg in (for_builder, for_scout, urgent, expired):
+            self.coordination_manager.send_message(msg)
+        
+        messages = self.coordination_manager.get_messages_for_agent("builder")
+        self.assertEqual(messages, [urgent, for_builder])
+        self.assertEqual(self.coordination_manager.message_queue.size(), 1)
+        self.assertEqual(self.coordination_manager.get_messages_for_agent("scout"), [for_scout])
+    
     def test_message_acknowledgment(self):
         """Test message acknowledgment system"""
         msg = Message("agent1", "agent2", "Test", requires_ack=True)
@@ -461,7 +893,8 @@ class IntegrationTests(unittest.TestCase):
     def setUp(self):
         self.grid = Grid(6, 5)
         
-    @patch('openai.OpenAI')
+    @patch('app.agents.openai_client._client', None)
+    @patch('openai.AsyncOpenAI')
     def test_full_simulation_cycle(self, mock_openai):
         """Test a complete simulation cycle"""
         # Mock LLM responses
@@ -469,7 +902,7 @@ class IntegrationTests(unittest.TestCase):
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = "MOVE north"
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         mock_openai.return_value = mock_client
         
         # Initialize system
@@ -478,7 +911,7 @@ class IntegrationTests(unittest.TestCase):
         
         # Run several simulation steps
         for i in range(5):
-            result = sim.step()
+            result = asyncio.run(sim.step())
             
             # Verify basic structure
             self.assertIn("logs", result)
@@ -490,7 +923,8 @@ class IntegrationTests(unittest.TestCase):
             # Verify agents are functioning
             self.assertGreater(len(result["agents"]), 0)
     
-    @patch('openai.OpenAI')
+    @patch('app.agents.openai_client._client', None)
+    @patch('openai.AsyncOpenAI')
     def test_error_recovery_integration(self, mock_openai):
         """Test error recovery in integrated system"""
         # Setup mock to sometimes fail
@@ -509,20 +943,20 @@ class IntegrationTests(unittest.TestCase):
             mock_response.choices[0].message.content = "WAIT"
             return mock_response
         
-        mock_client.chat.completions.create.side_effect = side_effect
+        mock_client.chat.completions.create = AsyncMock(side_effect=side_effect)
         
         # Initialize system with error handling
         from app.utils.error_handling import initialize_error_handling
         initialize_error_handling()
         
         from app.simulation import Simulation
-        sim = Simulation(width=3, 3)
+        sim = Simulation(width=3, height=3)
         
         # Run simulation - should handle errors gracefully
         error_count = 0
         for i in range(10):
             try:
-                result = sim.step()
+                result = asyncio.run(sim.step())
                 # Should still get valid results despite some failures
                 self.assertIn("step_count", result)
             except Exception as e:
@@ -599,6 +1033,14 @@ class TestSuite:
         test_classes = [
             TestGrid,
             TestAgentMemorySystem, 
+            TestMemoryIndex,
+            TestPlanningSystem,
+            TestAgentObservation,
+            TestScoutAgent,
+            TestStrategistAgent,
+            TestBuilderAgent,
+            TestLLMDispatcher,
+            TestLLMDecision,
             TestMessageQueueSystem,
             TestErrorHandling,
             TestLangGraphFlow,
@@ -648,12 +1090,12 @@ class TestSuite:
 # Additional utility functions for testing
 def create_test_environment():
     """Create a test environment with mocked external dependencies"""
-    with patch('openai.OpenAI') as mock_openai:
+    with patch('openai.AsyncOpenAI') as mock_openai:
         mock_client = Mock()
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = "WAIT"
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         mock_openai.return_value = mock_client
         
         yield mock_openai, mock_client
@@ -25,7 +25,7 @@ class MessageQueue:
         """Add message to queue. Returns False if queue is full."""
         with self._lock:
             if len(self._queue) >= self.max_size:
-                logger.warning(f"Message queue full, dropping message: {message.message_id}")
+                logger.warning("Message queue full, dropping message: %s", message.message_id)
                 return False
             
             # Priority queue entry: (priority_value, timestamp, counter, message)
@@ -38,7 +38,7 @@ class MessageQueue:
                 self._pending_acks[message.message_id] = message
                 
             self._message_history.append(message)
-            logger.debug(f"Enqueued message {message.message_id} from {message.sender}")
+            logger.debug("Enqueued message %s from %s", message.message_id, message.sender)
             return True
     
     def dequeue(self, agent_id: str) -> Optional[Message]:
@@ -54,7 +54,7 @@ class MessageQueue:
                 
                 # Check if message is expired
                 if message.is_expired():
-                    logger.debug(f"Message {message.message_id} expired, dropping")
+                    logger.debug("Message %s expired, dropping", message.message_id)
                     continue
                 
                 # Check if this message is for this agent
@@ -70,12 +70,32 @@ class MessageQueue:
             
             return result
     
+    def dequeue_all(self, agent_id: str) -> List[Message]:
+        """Get every pending message for an agent, in priority order, in one pass over the queue"""
+        with self._lock:
+            matched = []
+            remaining = []
+            for entry in self._queue:
+                message = entry[3]
+                if message.is_expired():
+                    logger.debug("Message %s expired, dropping", message.message_id)
+                elif message.recipient == agent_id or message.is_broadcast():
+                    matched.append(entry)
+                else:
+                    remaining.append(entry)
+            
+            if len(remaining) != len(self._queue):
+                heapq.heapify(remaining)
+                self._queue = remaining
+            matched.sort()
+            return [entry[3] for entry in matched]
+    
     def acknowledge(self, message_id: str, agent_id: str) -> bool:
         """Acknowledge receipt of a message"""
         with self._lock:
             if message_id in self._pending_acks:
                 message = self._pending_acks.pop(message_id)
-                logger.debug(f"Message {message_id} acknowledged by {agent_id}")
+                logger.debug("Message %s acknowledged by %s", message_id, agent_id)
                 return True
             return False
     
@@ -113,7 +133,7 @@ class SharedState:
                 if agent_id not in self.resource_allocations:
                     self.resource_allocations[agent_id] = defaultdict(int)
                 self.resource_allocations[agent_id][resource_type] += amount
-                logger.info(f"Allocated {amount} {resource_type} to {agent_id}")
+                logger.info("Allocated %s %s to %s", amount, resource_type, agent_id)
                 return True
             return False
     
@@ -125,7 +145,7 @@ class SharedState:
                 release_amount = min(allocated, amount)
                 self.resource_allocations[agent_id][resource_type] -= release_amount
                 self.resources[resource_type] += release_amount
-                logger.info(f"Released {release_amount} {resource_type} from {agent_id}")
+                logger.info("Released %s %s from %s", release_amount, resource_type, agent_id)
     
     def add_task_dependency(self, task: TaskDependency):
         """Add a task dependency"""
@@ -183,13 +203,7 @@ class CoordinationManager:
     
     def get_messages_for_agent(self, agent_id: str) -> List[Message]:
         """Get all pending messages for an agent"""
-        messages = []
-        while True:
-            msg = self.message_queue.dequeue(agent_id)
-            if msg is None:
-                break
-            messages.append(msg)
-        return messages
+        return self.message_queue.dequeue_all(agent_id)
     
     def handle_resource_request(self, request: ResourceRequest) -> Message:
         """Handle a resource allocation request"""